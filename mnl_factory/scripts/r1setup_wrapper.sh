@@ -28,13 +28,26 @@ if [ ! -f "$R1SETUP_SCRIPT" ]; then
     exit 1
 fi
 
+# Run the script through a loader that caches its bytecode next to it
+# (__pycache__/), so only the first run after an install or update pays for
+# compiling the single-file script. argv[0], __file__ and __main__ are the
+# same as when the script is executed directly.
+R1SETUP_LAUNCHER='import sys
+from importlib.machinery import SourceFileLoader
+script = sys.argv[1]
+sys.argv = sys.argv[1:]
+sys.path[0] = script.rsplit("/", 1)[0]
+import __main__
+__main__.__file__ = script
+exec(SourceFileLoader("__main__", script).get_code("__main__"), __main__.__dict__)'
+
 # Check if virtual environment Python exists, fallback to system python3
 if [ -f "$VENV_PYTHON" ]; then
     # Execute the actual r1setup script with virtual environment Python
-    exec "$VENV_PYTHON" "$R1SETUP_SCRIPT" "$@"
+    exec "$VENV_PYTHON" -c "$R1SETUP_LAUNCHER" "$R1SETUP_SCRIPT" "$@"
 else
-    echo "WARNING: Virtual environment Python not found at: $VENV_PYTHON"
-    echo "Falling back to system python3. Some dependencies might be missing."
+    echo "WARNING: Virtual environment Python not found at: $VENV_PYTHON" >&2
+    echo "Falling back to system python3. Some dependencies might be missing." >&2
     # Execute the actual r1setup script with system Python
-    exec python3 "$R1SETUP_SCRIPT" "$@"
+    exec python3 -c "$R1SETUP_LAUNCHER" "$R1SETUP_SCRIPT" "$@"
 fi 
\ No newline at end of file
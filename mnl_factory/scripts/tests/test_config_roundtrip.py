@@ -57,6 +57,18 @@ class TestConfigurationSchemaMetadata(unittest.TestCase):
         self.assertIn("fleet_state", metadata)
         self.assertIn("node-1", metadata["fleet_state"]["fleet"]["instances"])
 
+    def test_config_write_lock_is_reentrant_and_excludes_other_processes(self):
+        import fcntl
+
+        with self.cm.config_write_lock():
+            self.cm._save_config_with_metadata("demo", "mainnet", 1, update_symlink=False)
+            with open(self.app.configs_dir / ".lock", "a") as other:
+                with self.assertRaises(BlockingIOError):
+                    fcntl.flock(other, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+        with open(self.app.configs_dir / ".lock", "a") as other:
+            fcntl.flock(other, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
     def test_normalize_inventory_backfills_missing_fields(self):
         inventory = {
             "all": {
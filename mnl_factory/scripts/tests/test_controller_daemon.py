@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""Tests for the controller daemon and its UNIX-socket client."""
+
+import copy
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from tests.support import r1setup
+
+
+def _inventory():
+    return {"all": {"children": {"gpu_nodes": {"hosts": {
+        "node-1": {"ansible_host": "10.0.0.1", "ansible_user": "root", "node_status": "running", "last_status_update": "t0"},
+        "node-2": {"ansible_host": "10.0.0.2", "ansible_user": "root", "node_status": "stopped", "last_status_update": "t0"},
+    }}}}}
+
+
+class TestControllerDaemon(unittest.TestCase):
+    """Verify request round trips, change-driven reloads and background refreshes."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        base_path = Path(self.tmp.name)
+        self.app = MagicMock()
+        self.app.r1_setup_dir = base_path
+        self.app.active_config_file = base_path / "active_config.json"
+        self.app.active_config_file.write_text("{}")
+        self.app.config_file = base_path / "hosts.yml"
+        self.app.config_file.write_text("all: {}\n")
+        self.app.active_config = {"config_name": "demo"}
+        self.app.check_hosts_config.return_value = True
+        self.app.inventory = _inventory()
+        self.app._get_node_status_info.side_effect = self._status_info
+        self.app._update_node_status.side_effect = self._update_status
+        self.app.headless_commands = r1setup.HeadlessCommands(self.app)
+        self.daemon = r1setup.ControllerDaemon(self.app, base_path / "daemon.sock", refresh_interval=0)
+
+    def _hosts(self):
+        return self.app.inventory["all"]["children"]["gpu_nodes"]["hosts"]
+
+    def _status_info(self, name):
+        host = self._hosts()[name]
+        return {"status": host["node_status"], "last_update": host["last_status_update"]}
+
+    def _update_status(self, name, status):
+        self._hosts()[name].update(node_status=status, last_status_update="t1")
+
+    def _serve(self):
+        thread = threading.Thread(target=self.daemon.serve, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join, 5)
+        self.addCleanup(self.daemon.stop)
+        for _ in range(100):
+            if r1setup.ControllerDaemon.request(self.daemon.socket_path, ["ping"]) is not None:
+                return
+            time.sleep(0.02)
+        self.fail("daemon did not start")
+
+    def test_commands_run_against_the_warm_configuration(self):
+        self._serve()
+
+        first = r1setup.ControllerDaemon.request(self.daemon.socket_path, ["status", "--hosts", "node-1"])
+        second = r1setup.ControllerDaemon.request(self.daemon.socket_path, ["status"])
+
+        self.assertEqual(first["exit_code"], 0)
+        self.assertEqual(list(first["result"]["results"]), ["node-1"])
+        self.assertEqual(second["result"]["results"]["node-2"]["node_status"], "stopped")
+        self.app.load_configuration.assert_called_once()
+        self.assertEqual(os.stat(self.daemon.socket_path).st_mode & 0o777, 0o600)
+        self.assertEqual(self.app.ssh_control_dir, self.app.r1_setup_dir / "ssh-control")
+
+    def test_bad_requests_get_usage_errors(self):
+        self._serve()
+
+        response = r1setup.ControllerDaemon.request(self.daemon.socket_path, ["daemon"])
+
+        self.assertEqual(response["exit_code"], r1setup.HEADLESS_EXIT_USAGE)
+        self.assertEqual(self.daemon.handle_request(b"not json")["exit_code"], r1setup.HEADLESS_EXIT_USAGE)
+
+    def test_configuration_reloads_only_after_a_file_changes(self):
+        self.assertTrue(self.daemon.sync_configuration())
+        self.assertFalse(self.daemon.sync_configuration())
+
+        stat = self.app.config_file.stat()
+        os.utime(self.app.config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+
+        self.assertTrue(self.daemon.sync_configuration())
+        self.assertEqual(self.app.load_configuration.call_count, 2)
+
+    def test_refresh_merges_probed_statuses_into_a_fresh_reload(self):
+        disk = _inventory()
+        disk_hosts = disk["all"]["children"]["gpu_nodes"]["hosts"]
+
+        def probe(host_names, persist_versions=True):
+            # Another process removes one node and adds another while the probe runs
+            disk_hosts.pop("node-1")
+            disk_hosts["node-3"] = {"ansible_host": "10.0.0.3", "node_status": "unknown"}
+            return {"node-1": {"status": "running"}, "node-2": {"status": "running", "service_file_version": "v3"}}
+
+        self.app._get_real_time_node_status.side_effect = probe
+        self.app.load_configuration.side_effect = lambda: setattr(self.app, "inventory", copy.deepcopy(disk))
+        self.app._apply_probed_statuses.side_effect = r1setup.NodeStatusTracker(self.app)._apply_probed_statuses
+
+        self.daemon.refresh_statuses()
+
+        self.assertEqual(sorted(self._hosts()), ["node-2", "node-3"])
+        self.assertEqual(self._hosts()["node-2"]["node_status"], "running")
+        self.app._get_real_time_node_status.assert_called_once_with(["node-1", "node-2"], persist_versions=False)
+        self.app.record_service_file_versions.assert_called_once_with({"node-2": "v3"}, save=False)
+        self.app._save_configuration.assert_called_once()
+        self.app._update_node_status.assert_not_called()
+        self.assertIsNotNone(self.daemon.describe()["last_refresh"])
+
+
+class TestControllerDaemonClient(unittest.TestCase):
+    """Verify fallbacks when no daemon answers and forwarding when one does."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.socket_path = Path(self.tmp.name) / "daemon.sock"
+
+    def test_missing_or_stale_socket_means_no_daemon(self):
+        self.assertIsNone(r1setup.ControllerDaemon.request(self.socket_path, ["ping"]))
+        self.socket_path.write_text("")
+
+        self.assertIsNone(r1setup.ControllerDaemon.request(self.socket_path, ["ping"]))
+
+    def test_connection_lost_after_sending_is_an_error_not_a_fallback(self):
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.addCleanup(server.close)
+        server.bind(str(self.socket_path))
+        server.listen(1)
+
+        def accept_and_hang_up():
+            connection, _ = server.accept()
+            connection.recv(1024)
+            connection.close()
+
+        threading.Thread(target=accept_and_hang_up, daemon=True).start()
+
+        response = r1setup.ControllerDaemon.request(self.socket_path, ["restart"])
+
+        self.assertEqual(response["exit_code"], r1setup.HEADLESS_EXIT_FAILED)
+        self.assertEqual(response["result"]["status"], "error")
+
+    def test_headless_run_forwards_to_a_listening_daemon(self):
+        app = MagicMock(r1_setup_dir=Path(self.tmp.name))
+        commands = r1setup.HeadlessCommands(app)
+        commands.execute = MagicMock()
+        reply = {"exit_code": 1, "result": {"command": "status", "status": "failed", "results": {}}}
+
+        with patch.object(r1setup.ControllerDaemon, "request", return_value=reply) as request, \
+                patch("sys.stdout"), patch("sys.stderr"):
+            code = commands.run(["status", "--json"])
+
+        self.assertEqual(code, 1)
+        request.assert_called_once_with(self.socket_path, ["status", "--json"])
+        commands.execute.assert_not_called()
+
+
+class TestSSHMultiplexing(unittest.TestCase):
+    """Verify probes share a control socket only when the daemon enables it."""
+
+    def test_control_options_follow_ssh_control_dir(self):
+        app = r1setup.R1Setup.__new__(r1setup.R1Setup)
+        machine = {"ansible_host": "10.0.0.1", "ansible_user": "root"}
+
+        self.assertNotIn("ControlMaster=auto", app._build_machine_ssh_command(machine, "true"))
+        app.ssh_control_dir = Path("/tmp/ctl")
+        app.ssh_control_persist = 120
+        command = app._build_machine_ssh_command(machine, "true")
+
+        self.assertIn("ControlPath=/tmp/ctl/%C", command)
+        self.assertIn("ControlPersist=120", command)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""Tests that execute the remote discovery probe script against a fake systemd/docker host."""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from tests.support import r1setup
+
+
+FAKE_SYSTEMCTL = textwrap.dedent('''\
+    import json, os, sys
+    root = os.environ['FAKE_HOST_ROOT']
+    with open(os.path.join(root, 'calls.log'), 'a') as log:
+        log.write('systemctl ' + ' '.join(sys.argv[1:]) + '\\n')
+    units = os.path.join(root, 'units')
+    args = sys.argv[1:]
+    command = args[0]
+    names = [arg for arg in args[1:] if not arg.startswith('-') and arg not in ('Id', 'FragmentPath', 'Environment', 'ActiveState')]
+    if command == 'list-unit-files':
+        sys.exit(0)
+    if command == 'is-active':
+        for name in names:
+            print('active')
+        sys.exit(0)
+    if command == 'show':
+        blocks = []
+        for name in names:
+            unit = name if name.endswith('.service') else name + '.service'
+            blocks.append('\\n'.join([
+                'Id=' + unit,
+                'FragmentPath=' + os.path.join(units, unit),
+                'Environment=',
+                'ActiveState=active',
+            ]))
+        print('\\n\\n'.join(blocks))
+        sys.exit(0)
+    if command == 'cat':
+        for name in names:
+            unit = name if name.endswith('.service') else name + '.service'
+            path = os.path.join(units, unit)
+            print('# ' + path)
+            print(open(path).read())
+        sys.exit(0)
+    sys.exit(1)
+''')
+
+FAKE_DOCKER = textwrap.dedent('''\
+    import json, os, sys
+    root = os.environ['FAKE_HOST_ROOT']
+    with open(os.path.join(root, 'calls.log'), 'a') as log:
+        log.write('docker ' + ' '.join(sys.argv[1:]) + '\\n')
+    containers = json.load(open(os.path.join(root, 'containers.json')))
+    args = sys.argv[1:]
+    if args[0] == 'ps':
+        for name, info in sorted(containers.items()):
+            print(name + '\\t' + info['id'] + '\\t' + info['state'])
+        sys.exit(0)
+    if args[0] == 'inspect':
+        payload = []
+        for name in args[1:]:
+            if name in containers:
+                payload.append({
+                    'Name': '/' + name,
+                    'State': {'Status': containers[name]['state']},
+                    'Mounts': [{'Source': '/var/cache/' + name, 'Destination': '/edge_node/_local_cache', 'Type': 'bind'}],
+                })
+        print(json.dumps(payload))
+        sys.exit(0 if len(payload) == len(args) - 1 else 1)
+    sys.exit(1)
+''')
+
+UNIT_TEMPLATE = textwrap.dedent('''\
+    [Service]
+    Environment=R1SETUP_SERVICE_FILE_VERSION=v2
+    ExecStart=/usr/bin/docker run --rm --name {name} -v /var/cache/{name}:/edge_node/_local_cache ratio1/edge_node:mainnet
+''')
+
+
+class FakeDiscoveryHost:
+    """Temporary directory that mimics a host with edge_node units and containers."""
+
+    def __init__(self, unit_count):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.units_dir = self.root / 'units'
+        self.units_dir.mkdir()
+        bin_dir = self.root / 'bin'
+        bin_dir.mkdir()
+        for tool, source in (('systemctl', FAKE_SYSTEMCTL), ('docker', FAKE_DOCKER)):
+            path = bin_dir / tool
+            path.write_text(f"#!{sys.executable}\n{source}")
+            path.chmod(0o755)
+        self.containers = {}
+        for index in range(unit_count):
+            self.add_unit(f"edge_node_{index:02d}")
+        self.env = dict(os.environ, FAKE_HOST_ROOT=str(self.root), PATH=f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+
+    def add_unit(self, name, state='running'):
+        (self.units_dir / f"{name}.service").write_text(UNIT_TEMPLATE.format(name=name))
+        self.containers[name] = {'id': f"id-{name}", 'state': state}
+        self._write_containers()
+
+    def _write_containers(self):
+        (self.root / 'containers.json').write_text(json.dumps(self.containers))
+
+    def set_container_state(self, name, state):
+        self.containers[name]['state'] = state
+        self._write_containers()
+
+    def calls(self):
+        log_path = self.root / 'calls.log'
+        return log_path.read_text().splitlines() if log_path.exists() else []
+
+    def reset_calls(self):
+        (self.root / 'calls.log').unlink(missing_ok=True)
+
+    def run_probe(self, known_fingerprints=None):
+        command = r1setup.R1Setup._build_discovery_probe_command(known_fingerprints)
+        script = command.split("<<'PY'\n", 1)[1].rsplit("\nPY", 1)[0]
+        script = script.replace(
+            "UNIT_DIRS = ('/etc/systemd/system', '/lib/systemd/system')",
+            f"UNIT_DIRS = ({str(self.units_dir)!r},)",
+        )
+        completed = subprocess.run(
+            [sys.executable, '-'], input=script, capture_output=True, text=True, env=self.env, check=True,
+        )
+        return json.loads(completed.stdout)
+
+    def cleanup(self):
+        self._tmp.cleanup()
+
+
+class TestDiscoveryProbeFingerprints(unittest.TestCase):
+    """Incremental discovery: unchanged units short-circuit on the remote side."""
+
+    def setUp(self):
+        self.host = FakeDiscoveryHost(unit_count=3)
+        self.addCleanup(self.host.cleanup)
+
+    def test_first_scan_parses_every_unit_and_reports_fingerprints(self):
+        payload = self.host.run_probe()
+
+        services = {service['service_name']: service for service in payload['services']}
+        self.assertEqual(sorted(services), ['edge_node_00', 'edge_node_01', 'edge_node_02'])
+        self.assertTrue(all(service['fingerprint'] for service in services.values()))
+        self.assertEqual(services['edge_node_01']['container_name'], 'edge_node_01')
+        self.assertNotIn('unchanged', services['edge_node_01'])
+
+    def test_rescan_only_parses_units_whose_fingerprint_changed(self):
+        first = {service['service_name']: service['fingerprint'] for service in self.host.run_probe()['services']}
+        self.host.set_container_state('edge_node_02', 'exited')
+        self.host.reset_calls()
+
+        payload = self.host.run_probe(first)
+
+        services = {service['service_name']: service for service in payload['services']}
+        self.assertTrue(services['edge_node_00']['unchanged'])
+        self.assertTrue(services['edge_node_01']['unchanged'])
+        self.assertNotIn('unchanged', services['edge_node_02'])
+        self.assertNotEqual(services['edge_node_02']['fingerprint'], first['edge_node_02'])
+        cat_calls = [call for call in self.host.calls() if call.startswith('systemctl cat')]
+        self.assertTrue(cat_calls)
+        self.assertTrue(all('edge_node_00' not in call for call in cat_calls))
+
+
+class TestDiscoveryProbeBenchmark(unittest.TestCase):
+    """Regression benchmark: remote process count must not scale with unit count."""
+
+    UNIT_COUNT = 20
+
+    def setUp(self):
+        self.host = FakeDiscoveryHost(unit_count=self.UNIT_COUNT)
+        self.addCleanup(self.host.cleanup)
+
+    def test_full_scan_of_twenty_units_uses_batched_queries(self):
+        payload = self.host.run_probe()
+
+        self.assertEqual(len(payload['services']), self.UNIT_COUNT)
+        calls = self.host.calls()
+        self.assertEqual(len([call for call in calls if call.startswith('systemctl show')]), 1)
+        self.assertEqual(len([call for call in calls if call.startswith('systemctl cat')]), 1)
+        self.assertEqual(len([call for call in calls if call.startswith('docker inspect')]), 1)
+        self.assertLessEqual(len(calls), 5)
+
+        sample = {service['service_name']: service for service in payload['services']}['edge_node_07']
+        self.assertEqual(sample['service_state'], 'active')
+        self.assertTrue(sample['container_present'])
+        self.assertEqual(sample['container_state'], 'running')
+        self.assertEqual(sample['live_mounts'][0]['source'], '/var/cache/edge_node_07')
+        self.assertEqual(sample['image'], 'ratio1/edge_node:mainnet')
+        self.assertEqual(sample['service_file_version'], 'v2')
+
+    def test_unchanged_rescan_skips_cat_and_inspect(self):
+        known = {service['service_name']: service['fingerprint'] for service in self.host.run_probe()['services']}
+        self.host.reset_calls()
+
+        payload = self.host.run_probe(known)
+
+        self.assertTrue(all(service.get('unchanged') for service in payload['services']))
+        calls = self.host.calls()
+        self.assertFalse([call for call in calls if call.startswith(('systemctl cat', 'docker inspect'))])
+        self.assertLessEqual(len(calls), 3)
+
+
+class TestDiscoveryFingerprintMerge(unittest.TestCase):
+    """Controller side: reuse cached candidates for unchanged units."""
+
+    def setUp(self):
+        self.app = r1setup.R1Setup.__new__(r1setup.R1Setup)
+        self.app.print_debug = MagicMock()
+        self.machine = {"ansible_host": "10.0.0.5", "ansible_user": "root"}
+
+    def test_unchanged_units_reuse_cached_candidates(self):
+        cached = {
+            "service_name": "edge_node",
+            "container_name": "edge_node",
+            "environment": "mainnet",
+            "discovery_fingerprint": "aaaa",
+        }
+        self.app._run_machine_probe = MagicMock(return_value={
+            "status": "success",
+            "stdout": json.dumps({"services": [
+                {"service_name": "edge_node", "fingerprint": "aaaa", "unchanged": True},
+                {"service_name": "edge_node_2", "fingerprint": "bbbb", "container_name": "edge_node_2",
+                 "image": "ratio1/edge_node:testnet"},
+            ]}),
+        })
+
+        result = self.app.discover_existing_edge_node_services(self.machine, [cached])
+
+        probe_command = self.app._run_machine_probe.call_args.args[1]
+        self.assertIn('{"edge_node": "aaaa"}', probe_command)
+        self.assertEqual(result["reused_count"], 1)
+        self.assertEqual(result["candidates"][0], cached)
+        self.assertEqual(result["candidates"][1]["discovery_fingerprint"], "bbbb")
+        self.assertEqual(result["candidates"][1]["environment"], "testnet")
+
+    def test_candidates_without_fingerprint_are_not_sent_as_known(self):
+        self.app._run_machine_probe = MagicMock(return_value={"status": "success", "stdout": '{"services": []}'})
+
+        self.app.discover_existing_edge_node_services(self.machine, [{"service_name": "edge_node"}])
+
+        probe_command = self.app._run_machine_probe.call_args.args[1]
+        self.assertIn("KNOWN_FINGERPRINTS = json.loads('{}')", probe_command)
+
+
+if __name__ == "__main__":
+    unittest.main()
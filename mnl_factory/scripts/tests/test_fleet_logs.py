@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""Tests for fleet-wide log workflows (multi-node tail, export, search)."""
+
+import gzip
+import json
+import os
+import re
+import shlex
+import subprocess
+import sys
+import tarfile
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from tests.support import r1setup
+
+
+class _PipeSource:
+    """Readable end of an os.pipe with a writer helper."""
+
+    def __init__(self):
+        self.read_fd, self.write_fd = os.pipe()
+
+    def fileno(self):
+        return self.read_fd
+
+    def write(self, data: bytes) -> None:
+        os.write(self.write_fd, data)
+
+    def close_writer(self) -> None:
+        os.close(self.write_fd)
+
+    def close(self) -> None:
+        os.close(self.read_fd)
+
+
+class TestLogStreamMultiplexer(unittest.TestCase):
+    """Verify fair, filtered fan-in of several node streams."""
+
+    def setUp(self):
+        self.sources = {}
+        self.emitted = []
+
+    def tearDown(self):
+        for source in self.sources.values():
+            source.close()
+
+    def _source(self, name):
+        source = _PipeSource()
+        self.sources[name] = source
+        return source
+
+    def _emit(self, name, line):
+        self.emitted.append((name, line))
+
+    def test_emits_every_line_with_source_and_joins_partial_chunks(self):
+        node_a = self._source("node-a")
+        node_b = self._source("node-b")
+        node_a.write(b"first\nsec")
+        node_a.write(b"ond\ntrailing-without-newline")
+        node_b.write(b"hello\n")
+        node_a.close_writer()
+        node_b.close_writer()
+
+        stats = r1setup.LogStreamMultiplexer(self.sources, self._emit).run()
+
+        self.assertEqual(
+            [line for name, line in self.emitted if name == "node-a"],
+            ["first", "second", "trailing-without-newline"],
+        )
+        self.assertEqual([line for name, line in self.emitted if name == "node-b"], ["hello"])
+        self.assertEqual(stats["node-a"]["lines_emitted"], 3)
+
+    def test_round_robin_keeps_quiet_node_from_being_starved(self):
+        chatty = self._source("chatty")
+        quiet = self._source("quiet")
+        chatty.write(b"".join(f"noise {i}\n".encode() for i in range(200)))
+        quiet.write(b"important\n")
+        chatty.close_writer()
+        quiet.close_writer()
+
+        r1setup.LogStreamMultiplexer(self.sources, self._emit, burst_lines=10).run()
+
+        quiet_index = self.emitted.index(("quiet", "important"))
+        self.assertLessEqual(quiet_index, 10)
+        self.assertEqual(len(self.emitted), 201)
+
+    def test_client_side_filter_counts_dropped_lines(self):
+        node = self._source("node-a")
+        node.write(b"INFO ok\nERROR boom\nINFO fine\n")
+        node.close_writer()
+
+        stats = r1setup.LogStreamMultiplexer(
+            self.sources, self._emit, line_filter=re.compile("ERROR"),
+        ).run()
+
+        self.assertEqual(self.emitted, [("node-a", "ERROR boom")])
+        self.assertEqual(stats["node-a"]["lines_filtered"], 2)
+
+    def test_back_pressure_pauses_reading_when_queue_is_full(self):
+        node = self._source("node-a")
+        node.write(b"".join(f"line {i}\n".encode() for i in range(100)))
+        node.close_writer()
+        multiplexer = r1setup.LogStreamMultiplexer(
+            self.sources, self._emit, burst_lines=5, max_pending_lines=10,
+        )
+
+        multiplexer._read_source("node-a")
+        multiplexer._apply_back_pressure()
+
+        self.assertIn("node-a", multiplexer._paused)
+        self.assertEqual(multiplexer.stats["node-a"]["pauses"], 1)
+
+        stats = multiplexer.run()
+        self.assertEqual(stats["node-a"]["lines_emitted"], 100)
+
+
+class TestFleetLogTailCommands(unittest.TestCase):
+    """Verify remote tail command construction per helper mode."""
+
+    def setUp(self):
+        self.app = r1setup.R1Setup.__new__(r1setup.R1Setup)
+        self.app.config_manager = r1setup.ConfigurationManager(MagicMock())
+        self.service = r1setup.FleetLogService(self.app)
+
+    def test_standard_tail_without_filter_uses_get_logs_helper(self):
+        command = self.service.build_tail_command("node-a", {"edge_node_service_name": "edge_node"})
+
+        self.assertEqual(command, "get_logs -n 20 -f")
+
+    def test_standard_pushdown_filter_queries_unit_directly(self):
+        command = self.service.build_tail_command(
+            "node-a", {"edge_node_service_name": "edge_node"}, pushdown_pattern="ERROR|WARN",
+        )
+
+        self.assertEqual(command, "journalctl -a -u edge_node -n 20 -f --grep 'ERROR|WARN'")
+
+    def test_expert_pushdown_filter_routes_through_dispatcher(self):
+        command = self.service.build_tail_command(
+            "node-b",
+            {
+                "r1setup_topology_mode": "expert",
+                "edge_node_service_name": "edge_node2",
+                "mnl_docker_container_name": "edge_node2",
+            },
+            history_lines=5,
+            pushdown_pattern="timeout",
+        )
+
+        self.assertEqual(command, "r1service edge_node2 logs -n 5 -f --grep timeout")
+
+
+class TestFleetLogExport(unittest.TestCase):
+    """Verify streamed, concurrent log export and its manifest."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self.tmp.name)
+        self.app = r1setup.R1Setup.__new__(r1setup.R1Setup)
+        self.app.config_manager = r1setup.ConfigurationManager(MagicMock())
+        self.app.print_colored = MagicMock()
+        self.service = r1setup.FleetLogService(self.app)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    @staticmethod
+    def _local_command(script):
+        return [sys.executable, "-c", script]
+
+    def test_export_command_carries_time_window(self):
+        command = self.service.build_export_command(
+            "node-a", {"edge_node_service_name": "edge_node"},
+            lines=500, since="2026-10-01 00:00:00", until="2026-10-02 00:00:00",
+        )
+
+        self.assertEqual(
+            command,
+            "journalctl -a -u edge_node -n 500 --since '2026-10-01 00:00:00' "
+            "--until '2026-10-02 00:00:00' --no-pager",
+        )
+
+    def test_stream_command_to_file_gzips_and_counts(self):
+        dest = self.tmp_path / "node.log.gz"
+        result = self.service.stream_command_to_file(
+            self._local_command("import sys\nfor i in range(3000): sys.stdout.write(f'line {i}\\n')"),
+            dest,
+        )
+
+        self.assertEqual(result["status"], "success")
+        self.assertEqual(result["lines"], 3000)
+        with gzip.open(dest, "rb") as f:
+            content = f.read()
+        self.assertEqual(len(content), result["bytes"])
+        self.assertLess(result["file_bytes"], result["bytes"])
+
+    def test_stream_command_to_file_reports_remote_failure(self):
+        result = self.service.stream_command_to_file(
+            self._local_command("import sys; sys.stderr.write('permission denied'); sys.exit(3)"),
+            self.tmp_path / "node.log.gz",
+        )
+
+        self.assertEqual(result["status"], "error")
+        self.assertEqual(result["returncode"], 3)
+        self.assertIn("permission denied", result["message"])
+
+    def test_stream_command_to_file_leaves_no_partial_file_on_failure(self):
+        dest = self.tmp_path / "node.log"
+        dest.write_text("previous export\n")
+
+        failed = self.service.stream_command_to_file(
+            self._local_command("print('partial'); import sys; sys.exit(2)"),
+            dest, compress=False, header=b"# header\n",
+        )
+        missing = self.service.stream_command_to_file(
+            ["/nonexistent/ssh"], self.tmp_path / "other.log", compress=False, header=b"# header\n",
+        )
+
+        self.assertEqual(failed["status"], "error")
+        self.assertEqual(missing["status"], "error")
+        self.assertEqual(dest.read_text(), "previous export\n")
+        self.assertEqual(sorted(p.name for p in self.tmp_path.iterdir()), ["node.log"])
+
+    def test_stream_command_to_file_removes_temp_file_when_interrupted(self):
+        dest = self.tmp_path / "node.log.gz"
+        with patch.object(r1setup.subprocess, "Popen", side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                self.service.stream_command_to_file(self._local_command("print('x')"), dest)
+
+        self.assertEqual(list(self.tmp_path.iterdir()), [])
+
+    def test_export_logs_writes_manifest_and_bundles(self):
+        hosts = {
+            "node-a": {"ansible_host": "10.0.0.1", "ansible_user": "root"},
+            "node-b": {"ansible_host": "10.0.0.2", "ansible_user": "root"},
+        }
+        scripts = {
+            "node-a": "print('a1'); print('a2')",
+            "node-b": "import sys; sys.exit(1)",
+        }
+        self.app._build_node_ssh_command = MagicMock(
+            side_effect=lambda name, config, remote: self._local_command(scripts[name])
+        )
+        export_dir = self.tmp_path / "fleet-logs"
+
+        manifest = self.service.export_logs(["node-a", "node-b"], hosts, export_dir, lines=10)
+
+        self.assertEqual(manifest["nodes"]["node-a"]["lines"], 2)
+        self.assertEqual(manifest["nodes"]["node-b"]["status"], "error")
+        self.assertIsNone(manifest["nodes"]["node-b"]["file"])
+        self.assertFalse((export_dir / "node-b.log.gz").exists())
+        self.assertEqual(manifest["totals"]["succeeded"], 1)
+        self.assertEqual(manifest["totals"]["failed"], 1)
+        on_disk = json.loads((export_dir / "manifest.json").read_text())
+        self.assertEqual(on_disk["totals"]["lines"], 2)
+
+        tar_path = self.service.bundle_export_directory(export_dir)
+
+        self.assertFalse(export_dir.exists())
+        with tarfile.open(tar_path) as tar:
+            self.assertIn("fleet-logs/node-a.log.gz", tar.getnames())
+            self.assertIn("fleet-logs/manifest.json", tar.getnames())
+
+
+class TestFleetLogSearch(unittest.TestCase):
+    """Verify pushed-down journal search command and result parsing."""
+
+    def setUp(self):
+        self.app = r1setup.R1Setup.__new__(r1setup.R1Setup)
+        self.app.config_manager = r1setup.ConfigurationManager(MagicMock())
+        self.service = r1setup.FleetLogService(self.app)
+
+    def test_search_command_uses_grep_json_and_caps_on_node(self):
+        command = self.service.build_search_command(
+            "node-b",
+            {
+                "r1setup_topology_mode": "expert",
+                "edge_node_service_name": "edge_node2",
+                "mnl_docker_container_name": "edge_node2",
+            },
+            "OOM|killed",
+            since="-1h",
+            max_results=25,
+        )
+
+        self.assertTrue(command.startswith(
+            "{ r1service edge_node2 logs --since -1h --grep 'OOM|killed' -o json -r --no-pager; "
+        ))
+        self.assertIn("| awk -v cap=25 ", command)
+        self.assertIn("__R1SETUP_MATCH_COUNT__", command)
+
+    def _run_search_pipeline(self, journal_command, max_results=1):
+        self.app._build_remote_journal_command = MagicMock(return_value=journal_command)
+        command = self.service.build_search_command("node-a", {}, "ERROR", max_results=max_results)
+        completed = subprocess.run(["sh", "-c", command], capture_output=True, text=True, check=True)
+        return self.service.parse_search_output(completed.stdout)
+
+    def test_search_pipeline_caps_records_and_passes_journal_status_through(self):
+        records = "\n".join(json.dumps({"MESSAGE": f"ERROR {index}"}) for index in range(3))
+
+        found = self._run_search_pipeline(f"printf '%s\\n' {shlex.quote(records)}")
+        failed = self._run_search_pipeline("sh -c 'echo bad regex >&2; exit 1'")
+
+        self.assertEqual((found["match_count"], found["returned"], found["journal_status"]), (3, 1, 0))
+        self.assertEqual((failed["match_count"], failed["journal_status"]), (0, 1))
+
+    def test_parse_search_output_reports_truncation_and_decodes_messages(self):
+        stdout = "\n".join([
+            json.dumps({"__REALTIME_TIMESTAMP": "1760000000000000", "MESSAGE": "ERROR one", "PRIORITY": "3"}),
+            json.dumps({"__REALTIME_TIMESTAMP": "1760000001000000", "MESSAGE": list(b"ERROR two")}),
+            "__R1SETUP_MATCH_COUNT__ 7",
+        ])
+
+        parsed = self.service.parse_search_output(stdout)
+
+        self.assertEqual(parsed["match_count"], 7)
+        self.assertEqual(parsed["returned"], 2)
+        self.assertTrue(parsed["truncated"])
+        self.assertEqual(parsed["records"][1]["message"], "ERROR two")
+        self.assertTrue(parsed["records"][0]["timestamp"].startswith("2025-10-"))
+
+    def test_search_logs_collects_per_node_results(self):
+        self.app.settings_manager = MagicMock(connection_timeout=30)
+        hosts = {
+            "node-a": {"ansible_host": "10.0.0.1", "ansible_user": "root"},
+            "node-b": {"ansible_host": "10.0.0.2", "ansible_user": "root"},
+            "node-c": {"ansible_host": "10.0.0.3", "ansible_user": "root"},
+        }
+        outputs = {
+            "node-a": "print('__R1SETUP_MATCH_COUNT__ 0'); print('__R1SETUP_JOURNAL_STATUS__ 1')",
+            "node-b": "import sys; sys.stderr.write('No journal files'); sys.exit(1)",
+            "node-c": "import sys; sys.stderr.write('Bad --grep pattern'); "
+                      "print('__R1SETUP_MATCH_COUNT__ 0'); print('__R1SETUP_JOURNAL_STATUS__ 1')",
+        }
+        self.app._build_node_ssh_command = MagicMock(
+            side_effect=lambda name, config, remote: [sys.executable, "-c", outputs[name]]
+        )
+
+        results = self.service.search_logs(["node-a", "node-b", "node-c"], hosts, "ERROR")
+
+        self.assertEqual(results["node-a"]["status"], "success")
+        self.assertEqual(results["node-a"]["match_count"], 0)
+        self.assertEqual(results["node-b"]["status"], "error")
+        self.assertIn("No journal files", results["node-b"]["message"])
+        self.assertEqual(results["node-c"]["status"], "error")
+        self.assertIn("Bad --grep pattern", results["node-c"]["message"])
+
+
+if __name__ == "__main__":
+    unittest.main()
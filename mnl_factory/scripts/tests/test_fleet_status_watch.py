@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""Tests for the live status watch and its digest probes."""
+
+import copy
+import io
+import json
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from tests.support import r1setup
+
+
+def _hosts():
+    return {
+        "node-a": {"ansible_host": "10.0.0.1", "edge_node_service_name": "edge_node_a", "mnl_docker_container_name": "edge_node_a"},
+        "node-b": {"ansible_host": "10.0.0.1", "edge_node_service_name": "edge_node_b", "mnl_docker_container_name": "edge_node_b"},
+        "node-c": {"ansible_host": "10.0.0.2"},
+    }
+
+
+def _state(digest, units, containers):
+    return json.dumps({"units": units, "containers": containers, "digest": digest})
+
+
+class TestFleetStatusWatcher(unittest.TestCase):
+    """Verify status mapping, digest short-circuits, persistence and delta rendering."""
+
+    def setUp(self):
+        self.stored = {}
+        self.app = MagicMock(colors={"green": "", "red": "", "yellow": "", "white": "", "cyan": "", "end": ""})
+        self.app._get_status_display_info.side_effect = lambda status: ("*", "white", status)
+        self.app._get_node_status_info.side_effect = lambda name: {"status": self.stored.get(name, "unknown")}
+        self.app._apply_probed_statuses.side_effect = lambda data: [
+            self.stored.__setitem__(name, entry["status"]) or name for name, entry in data.items()
+        ]
+        self.replies = {}
+        self.app._run_machine_probe.side_effect = lambda host_config, command: self.replies[host_config["ansible_host"]]
+        self.out = io.StringIO()
+        self.watcher = r1setup.FleetStatusWatcher(self.app, out=self.out, terminal_size=lambda: (100, 40))
+        self.targets = self.watcher.collect_targets(_hosts())
+
+    def _round(self, now):
+        changed = self.watcher.refresh(self.targets)
+        return changed, self.watcher.apply_changes(changed, now)
+
+    def test_targets_keep_each_instances_unit_and_container(self):
+        self.assertEqual(self.targets["root@10.0.0.1:22"]["instances"], {
+            "node-a": ("edge_node_a", "edge_node_a"),
+            "node-b": ("edge_node_b", "edge_node_b"),
+        })
+        self.assertEqual(self.targets["root@10.0.0.2:22"]["instances"]["node-c"], ("edge_node", "edge_node"))
+
+    def test_unit_and_container_states_map_to_node_statuses(self):
+        target = self.targets["root@10.0.0.1:22"]
+
+        statuses = self.watcher.resolve_instance_statuses(target, {
+            "units": {"edge_node_a": "active", "edge_node_b": "not-found"},
+            "containers": {"edge_node_a": "running", "edge_node_b": "absent"},
+        })
+        service_only = self.watcher.resolve_instance_statuses(target, {
+            "units": {"edge_node_a": "failed"}, "containers": None,
+        })
+
+        self.assertEqual(statuses, {"node-a": "running", "node-b": "not_deployed"})
+        self.assertEqual(service_only, {"node-a": "stopped", "node-b": "unknown"})
+
+    def test_unchanged_machines_are_skipped_and_only_new_statuses_persisted(self):
+        self.stored["node-c"] = "stopped"
+        self.replies = {
+            "10.0.0.1": {"status": "success", "stdout": _state("d1", {"edge_node_a": "active", "edge_node_b": "active"}, {"edge_node_a": "running", "edge_node_b": "running"})},
+            "10.0.0.2": {"status": "success", "stdout": _state("d2", {"edge_node": "inactive"}, {"edge_node": "exited"})},
+        }
+        changed, _ = self._round(1000)
+        self.assertEqual(sorted(changed), ["node-a", "node-b", "node-c"])
+        self.assertEqual(self.stored, {"node-a": "running", "node-b": "running", "node-c": "stopped"})
+        self.assertEqual(self.watcher.events, [])
+
+        self.assertEqual(self.app._apply_probed_statuses.call_count, 1)
+        self.app._apply_probed_statuses.reset_mock()
+        self.replies["10.0.0.1"] = {"status": "success", "stdout": json.dumps({"digest": "d1"})}
+        self.replies["10.0.0.2"] = {"status": "error", "message": "timeout"}
+        changed, dirty = self._round(1010)
+
+        self.assertEqual(changed, {"node-c": ("stopped", "unreachable")})
+        self.assertEqual(dirty, {"node-c"})
+        self.app._apply_probed_statuses.assert_called_once_with({"node-c": {"status": "unreachable"}})
+        self.assertIn("node-c: stopped → unreachable", self.watcher.events[0])
+        self.assertIn("d1", self.app._run_machine_probe.call_args_list[-2].args[1] + self.app._run_machine_probe.call_args_list[-1].args[1])
+
+        changed, dirty = self._round(1020)
+        self.assertEqual(changed, {})
+        self.assertEqual(dirty, {"node-c"})
+
+    def test_persisting_a_round_keeps_config_changes_made_during_the_watch(self):
+        disk = {"all": {"children": {"gpu_nodes": {"hosts": copy.deepcopy(_hosts())}}}}
+        self.app.inventory = copy.deepcopy(disk)
+        disk_hosts = disk["all"]["children"]["gpu_nodes"]["hosts"]
+        # Another process removes node-b and tags node-a while the watch runs
+        disk_hosts.pop("node-b")
+        disk_hosts["node-a"]["r1setup_tags"] = ["canary"]
+        tracker = r1setup.NodeStatusTracker(self.app)
+        self.app.load_configuration.side_effect = lambda: setattr(self.app, "inventory", copy.deepcopy(disk))
+        self.app._get_node_status_info.side_effect = tracker._get_node_status_info
+        self.app._apply_probed_statuses.side_effect = tracker._apply_probed_statuses
+        self.app.record_service_file_versions.return_value = False
+        self.replies = {
+            "10.0.0.1": {"status": "success", "stdout": _state("d1", {"edge_node_a": "active", "edge_node_b": "active"}, {"edge_node_a": "running", "edge_node_b": "running"})},
+            "10.0.0.2": {"status": "error", "message": "timeout"},
+        }
+
+        self._round(1000)
+
+        hosts = self.app.inventory["all"]["children"]["gpu_nodes"]["hosts"]
+        self.assertEqual(sorted(hosts), ["node-a", "node-c"])
+        self.assertEqual(hosts["node-a"]["r1setup_tags"], ["canary"])
+        self.assertEqual(hosts["node-a"]["node_status"], "running")
+        self.assertEqual(hosts["node-c"]["node_status"], "unreachable")
+        self.app.config_manager.config_write_lock.assert_called_once_with()
+        self.app._save_configuration.assert_called_once_with()
+        self.app._update_node_status.assert_not_called()
+
+    def test_render_redraws_only_dirty_rows_after_the_first_frame(self):
+        self.watcher.row_order = [("m1", "node-a"), ("m1", "node-b")]
+        self.watcher.statuses = {"node-a": "running", "node-b": "running"}
+        self.watcher.render(set(), 1000, 0.1, "Watch", full=True)
+        self.assertIn("\033[2J", self.out.getvalue())
+        self.assertIn("node-b", self.out.getvalue())
+
+        self.out.seek(0)
+        self.out.truncate()
+        self.watcher.statuses["node-b"] = "stopped"
+        self.watcher.transitions["node-b"] = "running"
+        self.watcher.render({"node-b"}, 1010, 0.1, "Watch")
+
+        frame = self.out.getvalue()
+        self.assertNotIn("\033[2J", frame)
+        self.assertNotIn("node-a", frame)
+        self.assertIn("\033[5;1H\033[2K", frame)
+        self.assertIn("running → stopped", frame)
+
+    def test_rows_beyond_the_terminal_are_summarised(self):
+        self.watcher.terminal_size = lambda: (80, 16)
+        self.watcher.row_order = [("m1", f"node-{index}") for index in range(10)]
+
+        self.watcher.render(set(), 1000, 0.1, "Watch", full=True)
+
+        self.assertIn("… 9 more node(s)", self.out.getvalue())
+        self.assertNotIn("node-1 ", self.out.getvalue())
+
+    def test_watch_stops_on_interrupt_and_saves_events(self):
+        self.watcher.refresh = MagicMock(side_effect=[{"node-a": (None, "running")}, {"node-a": ("running", "stopped")}, KeyboardInterrupt])
+        self.watcher.sleep = MagicMock()
+
+        rounds = self.watcher.watch(_hosts(), 5, "Watch")
+
+        self.assertEqual(rounds, 2)
+        self.assertEqual(self.watcher.sleep.call_count, 2)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = self.watcher.save_events(Path(tmp) / "logs")
+            self.assertIn("node-a: running → stopped", path.read_text())
+
+
+class TestWatchProbeScript(unittest.TestCase):
+    """Run the remote probe locally; a repeated digest suppresses the state."""
+
+    def _run(self, known_digest=""):
+        command = r1setup.FleetStatusWatcher.build_probe_command(["edge_node"], ["edge_node"], known_digest)
+        script = command.split("<<'PY'\n", 1)[1].rsplit("\nPY", 1)[0]
+        completed = subprocess.run([sys.executable, "-"], input=script, capture_output=True, text=True, check=True)
+        return json.loads(completed.stdout.splitlines()[-1])
+
+    def test_probe_reports_state_then_only_its_digest(self):
+        first = self._run()
+        second = self._run(first["digest"])
+
+        self.assertIn("units", first)
+        self.assertEqual(second, {"digest": first["digest"]})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""Tests for the fleet telemetry sampler and its ring-file store."""
+
+import csv
+import json
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from tests.support import r1setup
+
+
+SMALL_TIERS = ((0, 4), (60, 3))
+
+
+class TestTelemetryRingStore(unittest.TestCase):
+    """Verify wraparound, downsampling and persistence of the ring file."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = Path(self.tmp.name) / "machine.ring"
+
+    def _store(self, tiers=SMALL_TIERS):
+        return r1setup.TelemetryRingStore(self.path, tiers=tiers)
+
+    def test_raw_tier_keeps_only_the_newest_samples(self):
+        with self._store() as store:
+            for index in range(6):
+                store.append(1000 + index, {"load1": float(index)})
+            rows = store.read(0)
+
+        self.assertEqual([row["load1"] for row in rows], [2.0, 3.0, 4.0, 5.0])
+        self.assertIsNone(rows[0]["gpu_util_pct"])
+        self.assertEqual(self.path.stat().st_size, self._store().size)
+
+    def test_samples_survive_reopening_the_file(self):
+        with self._store() as store:
+            store.append(1000, {"load1": 1.5, "restarts": 2})
+        with self._store() as store:
+            rows = store.read(0)
+
+        self.assertEqual(rows, [dict(rows[0], timestamp=1000.0, load1=1.5, restarts=2.0)])
+
+    def test_coarse_tier_averages_gauges_and_keeps_last_counter(self):
+        with self._store() as store:
+            store.append(600, {"load1": 1.0, "restarts": 3})
+            store.append(630, {"load1": 3.0, "restarts": 4})
+            store.append(650, {"restarts": 5})
+            store.append(660, {"load1": 7.0, "restarts": 5})
+            rows = store.read(1)
+
+        self.assertEqual([row["timestamp"] for row in rows], [600.0, 660.0])
+        self.assertEqual(rows[0]["samples"], 3)
+        self.assertEqual(rows[0]["load1"], 2.0)
+        self.assertEqual(rows[0]["restarts"], 5.0)
+        self.assertEqual(rows[1]["load1"], 7.0)
+
+    def test_layout_change_resets_the_file(self):
+        with self._store() as store:
+            store.append(1000, {"load1": 1.0})
+
+        with self._store(tiers=((0, 4), (120, 3))) as store:
+            self.assertEqual(store.read(0), [])
+
+    def test_read_since_and_limit(self):
+        with self._store() as store:
+            for index in range(4):
+                store.append(1000 + index, {"load1": float(index)})
+
+            self.assertEqual([row["load1"] for row in store.read(0, since=1002)], [2.0, 3.0])
+            self.assertEqual([row["load1"] for row in store.read(0, limit=1)], [3.0])
+
+
+class TestFleetTelemetryService(unittest.TestCase):
+    """Verify target grouping, parallel sampling, trends and export."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.app = MagicMock(r1_setup_dir=Path(self.tmp.name))
+        self.service = r1setup.FleetTelemetryService(self.app)
+        self.hosts = {
+            "node-a": {
+                "ansible_host": "10.0.0.1",
+                "mnl_docker_volume_path": "/var/cache/edge_node_a",
+                "edge_node_service_name": "edge_node_a",
+                "mnl_docker_container_name": "edge_node_a",
+            },
+            "node-b": {
+                "ansible_host": "10.0.0.1",
+                "mnl_docker_volume_path": "/var/cache/edge_node_b",
+                "edge_node_service_name": "edge_node_b",
+                "mnl_docker_container_name": "edge_node_b",
+            },
+            "node-c": {"ansible_host": "10.0.0.2"},
+        }
+
+    def test_targets_group_instances_per_machine(self):
+        targets = self.service.collect_targets(self.hosts)
+
+        self.assertEqual(sorted(targets), ["root@10.0.0.1:22", "root@10.0.0.2:22"])
+        machine = targets["root@10.0.0.1:22"]
+        self.assertEqual(machine["instances"], ["node-a", "node-b"])
+        self.assertEqual(machine["services"], ["edge_node_a", "edge_node_b"])
+        self.assertEqual(machine["host_config"], self.hosts["node-a"])
+
+    def test_parse_keeps_known_numeric_metrics(self):
+        sample = self.service.parse_probe_output('noise\n{"load1": 0.5, "restarts": 2, "bogus": 1, "gpu_util_pct": null}\n')
+
+        self.assertEqual(sample, {"load1": 0.5, "restarts": 2.0})
+        with self.assertRaises(ValueError):
+            self.service.parse_probe_output("")
+
+    def test_sample_machines_probes_once_per_machine_and_stores_samples(self):
+        def probe(host_config, command):
+            if host_config["ansible_host"] == "10.0.0.2":
+                return {"status": "error", "message": "unreachable"}
+            return {"status": "success", "stdout": json.dumps({"load1": 1.25, "containers_running": 2})}
+
+        self.app._run_machine_probe = MagicMock(side_effect=probe)
+
+        results = self.service.sample_machines(self.service.collect_targets(self.hosts), timestamp=1000)
+
+        self.assertEqual(self.app._run_machine_probe.call_count, 2)
+        self.assertEqual(results["root@10.0.0.1:22"]["status"], "success")
+        self.assertEqual(results["root@10.0.0.2:22"], {"status": "error", "message": "unreachable"})
+        with self.service.open_store("root@10.0.0.1:22") as store:
+            self.assertEqual(store.read(0)[0]["containers_running"], 2.0)
+        self.assertFalse(self.service.store_path("root@10.0.0.2:22").exists())
+
+    def test_sparkline_scales_values_and_leaves_gaps(self):
+        self.assertEqual(self.service.sparkline([0, None, 7, 3.5]), "▁ █▅")
+        self.assertEqual(self.service.sparkline([2, 2]), "▁▁")
+        self.assertEqual(self.service.sparkline([None]), "")
+
+    def test_trend_line_reports_restart_delta(self):
+        with self.service.open_store("m1") as store:
+            for index, restarts in enumerate((4, 4, 6)):
+                store.append(1000 + index, {"load1": float(index), "restarts": restarts})
+
+        line = self.service.machine_trend_line("m1")
+
+        self.assertIn("load ▁▅█ 2.00", line)
+        self.assertIn("restarts +2", line)
+        self.assertIsNone(self.service.machine_trend_line("never-sampled"))
+
+    def test_export_writes_csv_and_json(self):
+        with self.service.open_store("m1") as store:
+            store.append(1000, {"load1": 0.5})
+        csv_path = Path(self.tmp.name) / "out.csv"
+        json_path = Path(self.tmp.name) / "out.json"
+
+        self.assertEqual(self.service.export_samples(["m1", "missing"], csv_path), 1)
+        self.service.export_samples(["m1"], json_path, fmt="json")
+
+        rows = list(csv.DictReader(csv_path.open()))
+        self.assertEqual(rows[0]["machine_id"], "m1")
+        self.assertEqual(rows[0]["load1"], "0.5")
+        self.assertEqual(rows[0]["gpu_util_pct"], "")
+        payload = json.loads(json_path.read_text())
+        self.assertEqual(payload["machines"]["m1"][0]["load1"], 0.5)
+
+
+class TestTelemetryProbeScript(unittest.TestCase):
+    """Run the remote probe locally; missing tools just drop their metrics."""
+
+    def test_probe_prints_a_parseable_sample(self):
+        command = r1setup.FleetTelemetryService.build_probe_command(["/nonexistent/volume"], [], [])
+        script = command.split("<<'PY'\n", 1)[1].rsplit("\nPY", 1)[0]
+
+        completed = subprocess.run(
+            [sys.executable, "-"], input=script, capture_output=True, text=True, check=True,
+        )
+        sample = r1setup.FleetTelemetryService.parse_probe_output(completed.stdout)
+
+        self.assertIn("disk_free_gib", sample)
+        self.assertNotIn("restarts", sample)
+
+
+if __name__ == "__main__":
+    unittest.main()
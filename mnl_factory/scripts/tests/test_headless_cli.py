@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""Tests for the non-interactive command surface."""
+
+import io
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from tests.support import r1setup
+
+
+def _inventory():
+    return {"all": {"children": {"gpu_nodes": {"hosts": {
+        "node-1": {"ansible_host": "10.0.0.1", "ansible_user": "root", "node_status": "running", "last_status_update": "t0"},
+        "node-2": {"ansible_host": "10.0.0.2", "ansible_user": "root", "node_status": "stopped", "last_status_update": "t0"},
+        "edge-9": {"ansible_host": "10.0.0.3", "ansible_user": "root", "node_status": "error", "last_status_update": "t0"},
+    }}}}}
+
+
+class TestHeadlessCommands(unittest.TestCase):
+    """Verify host selection, JSON output, exit codes and service actions."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.app = MagicMock()
+        self.app.active_config = {"config_name": "demo"}
+        self.app.check_hosts_config.return_value = True
+        self.app.inventory = _inventory()
+        self.app.config_dir = Path(self.tmp.name)
+        self.app.r1_setup_dir = Path(self.tmp.name)
+        self.app._get_node_status_info.side_effect = self._status_info
+        self.app._update_node_status.side_effect = self._update_status
+        self.updates = 0
+        self.commands = r1setup.HeadlessCommands(self.app)
+
+    def _hosts(self):
+        return self.app.inventory["all"]["children"]["gpu_nodes"]["hosts"]
+
+    def _status_info(self, name):
+        host = self._hosts()[name]
+        return {"status": host["node_status"], "last_update": host["last_status_update"]}
+
+    def _update_status(self, name, status):
+        self.updates += 1
+        self._hosts()[name].update(node_status=status, last_status_update=f"t{self.updates}")
+
+    def _run(self, *argv):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with patch("sys.stdout", stdout), patch("sys.stderr", stderr):
+            code = self.commands.run(list(argv))
+        return code, stdout.getvalue()
+
+    def test_resolve_names_expands_globs_in_inventory_order(self):
+        names = ["node-1", "node-2", "edge-9"]
+
+        self.assertEqual(self.commands.resolve_names("", names), (names, []))
+        self.assertEqual(self.commands.resolve_names("edge-*, node-1", names), (["node-1", "edge-9"], []))
+        self.assertEqual(self.commands.resolve_names("node-1,gpu-*", names), (["node-1"], ["gpu-*"]))
+
+    def test_resolve_names_accepts_selection_expressions(self):
+        index = r1setup.HostSelectorIndex.for_hosts(self._hosts())
+        names = ["node-1", "node-2", "edge-9"]
+
+        self.assertEqual(self.commands.resolve_names("status=running|error", names, index), (["node-1", "edge-9"], []))
+        self.assertEqual(self.commands.resolve_names("node-* !status=stopped, edge-9", names, index), (["node-1", "edge-9"], []))
+        selected, unmatched = self.commands.resolve_names("colour=red", names, index)
+        self.assertEqual(selected, [])
+        self.assertIn("unknown attribute", unmatched[0])
+
+    def test_cached_status_prints_one_json_document(self):
+        code, stdout = self._run("status", "--hosts", "node-*", "--json")
+
+        payload = json.loads(stdout)
+        self.assertEqual(code, 0)
+        self.assertEqual(payload["command"], "status")
+        self.assertEqual(list(payload["results"]), ["node-1", "node-2"])
+        self.assertEqual(payload["results"]["node-2"]["node_status"], "stopped")
+        self.app._get_real_time_node_status.assert_not_called()
+        self.assertTrue(self.app.headless)
+
+    def test_exit_codes_for_unhealthy_nodes_usage_errors_and_missing_config(self):
+        self.assertEqual(self._run("status")[0], r1setup.HEADLESS_EXIT_FAILED)
+        self.assertEqual(self._run("status", "--hosts", "missing")[0], r1setup.HEADLESS_EXIT_USAGE)
+        self.assertEqual(self._run("status", "--bogus")[0], r1setup.HEADLESS_EXIT_USAGE)
+        self.app.active_config = {}
+        code, stdout = self._run("status", "--json")
+        self.assertEqual(code, r1setup.HEADLESS_EXIT_NO_CONFIG)
+        self.assertEqual(json.loads(stdout)["status"], "error")
+
+    def test_restart_reports_per_host_outcome_from_the_play_recap(self):
+        (self.app.config_dir / "playbooks").mkdir()
+        (self.app.config_dir / "playbooks" / "service_restart.yml").write_text("---\n")
+        self.app._rolling_waves_enabled.return_value = False
+        self.app._ensure_helper_mode_supported_for_hosts.return_value = True
+        self.app.run_generated_playbook.return_value = (False, "recap", ["node-1", "node-2"], {})
+        self.app.deployment_service._extract_successful_hosts_from_output.return_value = ["node-1"]
+
+        code, stdout = self._run("restart", "--hosts", "node-1,node-2")
+
+        self.assertEqual(code, r1setup.HEADLESS_EXIT_FAILED)
+        self.assertEqual(stdout.splitlines(), ["node-1\tsuccess\trunning", "node-2\tfailed\terror"])
+        self.assertEqual(self.app.run_generated_playbook.call_args.args[1], ["node-1", "node-2"])
+
+    def test_deploy_counts_only_hosts_the_run_moved_to_running(self):
+        self.app.get_mnl_app_env.return_value = "mainnet"
+        self.app.deployment_service._deploy_setup.side_effect = (
+            lambda *args, **kwargs: self._update_status("node-2", "running")
+        )
+
+        code, stdout = self._run("deploy", "--hosts", "node-1,node-2", "--json")
+
+        results = json.loads(stdout)["results"]
+        self.assertEqual(code, r1setup.HEADLESS_EXIT_FAILED)
+        self.assertEqual(results["node-1"]["status"], "failed")
+        self.assertEqual(results["node-2"]["status"], "success")
+        self.assertEqual(self.app.headless_hosts, ["node-1", "node-2"])
+        self.assertEqual(self.app.deployment_service._deploy_setup.call_args.kwargs["variant"], "cpu")
+
+
+class TestHeadlessPrompts(unittest.TestCase):
+    """Verify prompts never block once headless mode is on."""
+
+    def setUp(self):
+        self.app = r1setup.R1Setup.__new__(r1setup.R1Setup)
+        self.app.headless = True
+        self.app.headless_hosts = ["node-2"]
+
+    def test_prompts_take_defaults_and_required_input_raises(self):
+        with patch("builtins.input") as mocked_input:
+            self.assertEqual(self.app.get_input("Continue? (y/n)", "y"), "y")
+            self.app.wait_for_enter()
+            with self.assertRaises(EOFError):
+                self.app.get_input("Enter host", required=True)
+        mocked_input.assert_not_called()
+
+    def test_select_hosts_returns_command_line_selection(self):
+        hosts = {"node-1": {}, "node-2": {}}
+
+        self.assertEqual(self.app.select_hosts(hosts, "deploy", preselect_mode="undeployed"), ["node-2"])
+
+    def test_run_dispatches_before_interactive_startup(self):
+        self.app.headless_commands = MagicMock()
+        self.app.headless_commands.run.return_value = 3
+        self.app.check_ansible_installation = MagicMock()
+
+        with patch("sys.argv", ["r1setup", "status", "--json"]), self.assertRaises(SystemExit) as raised:
+            self.app.run()
+
+        self.assertEqual(raised.exception.code, 3)
+        self.app.headless_commands.run.assert_called_once_with(["status", "--json"])
+        self.app.check_ansible_installation.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""Tests for the host selector's attribute indexes, filters and windowed rendering."""
+
+import io
+import json
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from tests.support import r1setup
+
+
+def _hosts(count=3):
+    hosts = {}
+    for index in range(count):
+        hosts[f"node-{index}"] = {
+            "ansible_host": f"10.0.0.{index % 2}",
+            "ansible_user": "root",
+            r1setup.INSTALL_LAST_VARIANT_FIELD: "gpu" if index % 2 else "cpu",
+            r1setup.SERVICE_FILE_VERSION_FIELD: "v2" if index < 2 else "",
+        }
+    hosts["edge-x"] = {"ansible_host": "10.0.0.9", "ansible_user": "root", "r1setup_topology_mode": "expert"}
+    return hosts
+
+
+class TestHostSelectorIndex(unittest.TestCase):
+    """Verify attribute lookups, combined terms and cached rows."""
+
+    def setUp(self):
+        self.hosts = _hosts()
+        statuses = {"node-0": "running", "node-1": "stopped", "node-2": "running"}
+        self.fleet_state = {
+            "fleet": {
+                "machines": {"root@10.0.0.1:22": {"tags": ["rack1"]}},
+                "instances": {"node-0": {"tags": ["canary"]}, "node-1": {"assigned_machine_id": "root@10.0.0.1:22"}},
+            },
+            "selection_groups": {"gpu-rack": "variant=gpu tag=rack1", "loop": "@loop"},
+        }
+        self.index = r1setup.HostSelectorIndex.for_hosts(self.hosts, "mainnet", self.fleet_state, statuses)
+
+    def test_attribute_terms_use_the_precomputed_index(self):
+        self.assertEqual(self.index.query("status=running"), ["node-0", "node-2"])
+        self.assertEqual(self.index.query("machine=*10.0.0.1*"), ["node-1"])
+        self.assertEqual(self.index.query("variant=GPU"), ["node-1"])
+        self.assertEqual(self.index.query("version=v0 topology=standard"), ["node-2"])
+        self.assertEqual(self.index.query("env=mainnet"), list(self.hosts))
+        self.assertEqual(self.index.values("status"), [("running", 2), ("stopped", 1), ("unknown", 1)])
+
+    def test_name_terms_narrow_incrementally_and_combine_with_attributes(self):
+        self.assertEqual(self.index.query(""), list(self.hosts))
+        self.assertEqual(self.index.query("node"), ["node-0", "node-1", "node-2"])
+        self.index.names = []  # a longer term must be served from the cached "node" matches
+
+        self.assertEqual(self.index.query("NODE-2"), ["node-2"])
+        self.assertEqual(self.index.query("node status=stopped"), ["node-1"])
+        with self.assertRaises(ValueError):
+            self.index.query("colour=red")
+
+    def test_tags_groups_and_exclusions(self):
+        self.assertEqual(self.index.query("tag=rack1"), ["node-1"])
+        self.assertEqual(self.index.query("tag=canary|rack*"), ["node-0", "node-1"])
+        self.assertEqual(self.index.query("@gpu-rack"), ["node-1"])
+        self.assertEqual(self.index.query("node-* !tag=canary !status=stopped"), ["node-2"])
+        with self.assertRaises(ValueError):
+            self.index.query("@loop")
+        with self.assertRaises(ValueError):
+            self.index.query("@missing")
+
+    def test_sync_reindexes_only_changed_hosts(self):
+        for name, status in (("node-0", "running"), ("node-1", "stopped"), ("node-2", "running")):
+            self.hosts[name]["node_status"] = status
+        self.assertEqual(self.index.sync(self.hosts, "mainnet", self.fleet_state), 0)
+        self.assertEqual(self.index.query("status=stopped"), ["node-1"])
+
+        self.hosts["node-2"]["node_status"] = "stopped"
+        del self.hosts["edge-x"]
+        self.fleet_state["fleet"]["instances"]["node-0"]["tags"] = []
+
+        self.assertEqual(self.index.sync(self.hosts, "mainnet", self.fleet_state), 4)
+        self.assertEqual(self.index.query("status=stopped"), ["node-1", "node-2"])
+        self.assertEqual(self.index.query("tag=canary"), [])
+        self.assertEqual(self.index.values("topology"), [("standard", 3)])
+
+    def test_machine_index_inherits_instance_attributes(self):
+        machines = {
+            "root@10.0.0.0:22": {"instance_names": ["node-0", "node-2"]},
+            "root@10.0.0.1:22": {"instance_names": ["node-1"], "tags": ["rack1"]},
+            "spare": {"instance_names": [], "tags": ["rack1"]},
+        }
+
+        machine_index = self.index.machine_index(machines)
+
+        self.assertEqual(machine_index.query("tag=rack1"), ["root@10.0.0.1:22", "spare"])
+        self.assertEqual(machine_index.query("status=running"), ["root@10.0.0.0:22"])
+
+    def test_row_text_is_computed_once_per_width(self):
+        with patch.object(r1setup.R1Setup, "_format_install_history", return_value="CPU") as history:
+            first = self.index.row_text("node-0")
+            self.assertIs(self.index.row_text("node-0"), first)
+            self.index.row_text("node-0", include_attempt=False)
+
+        self.assertEqual(history.call_count, 2)
+        self.assertIn("running", first)
+
+
+class TestHostSelectorMenu(unittest.TestCase):
+    """Verify the windowed menu and filter commands of the fallback selector."""
+
+    def setUp(self):
+        self.app = r1setup.R1Setup.__new__(r1setup.R1Setup)
+        self.app.colors = {key: "" for key in ("red", "green", "yellow", "blue", "cyan", "white", "end")}
+        self.app._get_node_status_info = lambda name: {"status": "stopped" if name == "node-1" else "running"}
+        self.app._get_status_display_info = lambda status: ("*", "white", status.title())
+        self.app.get_mnl_app_env = MagicMock(return_value="mainnet")
+        self.hosts = _hosts(40)
+
+    def test_render_draws_only_the_visible_window(self):
+        host_list = ["All hosts"] + list(self.hosts)
+        output = io.StringIO()
+
+        with redirect_stdout(output):
+            self.app._render_host_menu(
+                self.hosts, host_list, set(), 12, "deploy", interactive=True,
+                view_start=10, page_size=5,
+            )
+
+        text = output.getvalue()
+        self.assertIn("↑ 10 more", text)
+        self.assertIn("↓ 27 more", text)
+        self.assertIn("→ [ ] node-11", text)
+        self.assertNotIn("node-8 ", text)
+        self.assertNotIn("node-20", text)
+
+    def test_fallback_selects_and_deselects_matching_hosts(self):
+        self.app.get_input = MagicMock(side_effect=["+status=running", "-machine=*10.0.0.0*", ""])
+
+        with redirect_stdout(io.StringIO()), patch("time.sleep"):
+            selected = self.app._fallback_select_hosts(self.hosts, "deploy", set())
+
+        self.assertEqual(selected, [f"node-{index}" for index in range(3, 40, 2)] + ["edge-x"])
+
+
+class TestTagsAndSelectionGroups(unittest.TestCase):
+    """Verify tags and groups persist in fleet state and keep the index current."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        base_path = Path(self.tmp.name)
+        self.app = MagicMock()
+        self.app.r1_setup_dir = base_path
+        self.app.config_dir = base_path
+        self.app.configs_dir = base_path / "configs"
+        self.app.configs_dir.mkdir()
+        self.app.config_file = base_path / "hosts.yml"
+        self.app.vars_file = base_path / "group_vars" / "variables.yml"
+        self.app.active_config_file = base_path / "active_config.json"
+        self.app.inventory = {"all": {"children": {"gpu_nodes": {"hosts": _hosts()}}}}
+        self.app.settings_manager = MagicMock(state_backend="files")
+        self.cm = r1setup.ConfigurationManager(self.app)
+        self.cm._update_hosts_symlink = MagicMock()
+        self.cm.active_config["config_name"] = "demo"
+        self.cm._save_config_with_metadata("demo", "testnet", 4, update_symlink=False)
+
+    def _fleet_state(self):
+        return json.loads((self.app.configs_dir / "demo.json").read_text())["fleet_state"]
+
+    def test_tags_persist_and_update_the_index_on_save(self):
+        self.assertEqual(self.cm.update_tags("instances", ["node-0", "node-2"], add=["Canary"]), 2)
+        self.assertEqual(self.cm.update_tags("machines", ["root@10.0.0.1:22"], add=["rack1"]), 1)
+        self.assertEqual(self.cm.update_tags("instances", ["node-2"], add=["canary"]), 0)
+
+        fleet_state = self._fleet_state()
+        self.assertEqual(fleet_state["fleet"]["instances"]["node-0"]["tags"], ["canary"])
+        self.assertEqual(fleet_state["fleet"]["machines"]["root@10.0.0.1:22"]["tags"], ["rack1"])
+        index = self.cm.get_selection_index()
+        self.assertEqual(index.query("tag=canary env=testnet"), ["node-0", "node-2"])
+        self.assertEqual(index.query("tag=rack1"), ["node-1"])
+
+        self.cm.update_tags("instances", ["node-0"], remove=["canary"])
+        self.assertNotIn("tags", self._fleet_state()["fleet"]["instances"]["node-0"])
+        self.assertEqual(index.query("tag=canary"), ["node-2"])
+        with self.assertRaises(ValueError):
+            self.cm.update_tags("instances", ["node-0"], add=["bad tag!"])
+        with self.assertRaises(ValueError):
+            self.cm.update_tags("instances", ["ghost"], add=["x"])
+
+    def test_selection_groups_round_trip_and_validate(self):
+        self.assertEqual(self.cm.save_selection_group("GPU", "variant=gpu"), ["node-1"])
+        self.assertEqual(self._fleet_state()["selection_groups"], {"gpu": "variant=gpu"})
+        self.assertEqual(self.cm.get_selection_index().query("@gpu"), ["node-1"])
+
+        with self.assertRaises(ValueError):
+            self.cm.save_selection_group("self", "@self")
+        with self.assertRaises(ValueError):
+            self.cm.save_selection_group("typo", "colour=red")
+
+        self.cm.fleet_state = self.cm._default_fleet_state()
+        self.cm.fleet_state = self.cm._merge_fleet_state(self._fleet_state(), self.app.inventory)
+        self.assertEqual(self.cm.get_selection_groups(), {"gpu": "variant=gpu"})
+        self.assertTrue(self.cm.delete_selection_group("gpu"))
+        self.assertFalse(self.cm.delete_selection_group("gpu"))
+        self.assertNotIn("selection_groups", self._fleet_state())
+
+    def test_shared_index_takes_statuses_from_the_status_column_source(self):
+        app = r1setup.R1Setup.__new__(r1setup.R1Setup)
+        app.config_manager = self.cm
+        app.inventory = self.app.inventory
+        live = {"node-0": "running", "node-1": "stopped"}
+        app._get_node_status_info = lambda name: {"status": live.get(name, "unknown"), "last_update": ""}
+        app._get_status_display_info = MagicMock()
+
+        index = app._build_host_selector_index(_hosts())
+
+        self.assertIs(index, self.cm.get_selection_index())
+        self.assertEqual(index.query("status=running"), ["node-0"])
+        self.assertEqual(index.query("status=stopped"), ["node-1"])
+
+        live["node-1"] = "running"
+        self.assertEqual(app._build_host_selector_index(_hosts()).query("status=running"), ["node-0", "node-1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
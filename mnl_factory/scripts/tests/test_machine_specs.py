@@ -31,6 +31,19 @@ class TestMachineSpecs(unittest.TestCase):
         self.assertEqual(result["cpu_total"], 4)
         self.assertEqual(result["memory_gb_total"], 15.6)
 
+    def test_probe_machine_specs_parses_optional_disk_and_gpu_lines(self):
+        completed = MagicMock(returncode=0, stdout="host-a\n16\n64.0\n420.5\n2\n", stderr="")
+
+        with patch.object(r1setup.subprocess, "run", return_value=completed):
+            result = self.app._probe_machine_specs({
+                "ansible_host": "10.0.0.1",
+                "ansible_user": "root",
+            })
+
+        self.assertEqual(result["status"], "success")
+        self.assertEqual(result["disk_gb_free"], 420.5)
+        self.assertEqual(result["gpu_total"], 2)
+
     def test_probe_machine_specs_rejects_implausible_memory_values(self):
         completed = MagicMock(returncode=0, stdout="host-a\n4\n20000\n", stderr="")
 
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""Tests for concurrent multi-instance migration batches."""
+
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from tests.support import r1setup
+
+
+GIB = 1024 ** 3
+
+
+def _plan(instance_name, source, target, size_gib=1, temp_dir="/tmp", **runtime):
+    target_runtime = {
+        "service_name": runtime.get("service_name", f"svc_{instance_name}"),
+        "container_name": runtime.get("container_name", f"ctr_{instance_name}"),
+        "volume_path": runtime.get("volume_path", f"/var/cache/{instance_name}"),
+    }
+    return {
+        "plan_id": f"migration-{instance_name}",
+        "status": "planned",
+        "instance_name": instance_name,
+        "source_machine_id": source,
+        "target_machine_id": target,
+        "runtime_name_policy": "preserve",
+        "source_runtime": {"volume_path": f"/var/cache/{instance_name}"},
+        "target_runtime": target_runtime,
+        "transfer": {
+            "source_archive_path": f"/tmp/r1setup_migration_{instance_name}.tar.gz",
+            "local_temp_dir": temp_dir,
+            "local_archive_path": str(Path(temp_dir) / f"{instance_name}.tar.gz"),
+            "target_archive_path": f"/tmp/r1setup_migration_{instance_name}.tar.gz",
+        },
+        "preflight": {"source_volume_bytes": size_gib * GIB, "target_free_bytes": 100 * GIB},
+        "validation": {"errors": [], "warnings": []},
+    }
+
+
+class TestMigrationBatchScheduler(unittest.TestCase):
+    """Verify admission, ordering and bandwidth shares."""
+
+    def test_bandwidth_budget_is_split_by_concurrent_moves_per_machine(self):
+        scheduler = r1setup.MigrationBatchScheduler(
+            MagicMock(), concurrency=2, source_bandwidth_kbps=100000, target_bandwidth_kbps=60000,
+        )
+        plans = [
+            _plan("n1", "m-a", "m-b"),
+            _plan("n2", "m-a", "m-b"),
+            _plan("n3", "m-a", "m-c"),
+        ]
+
+        limits = scheduler.bandwidth_limits(plans)
+
+        self.assertEqual(limits["n1"], {"download_kbps": 50000, "upload_kbps": 30000})
+        self.assertEqual(limits["n3"], {"download_kbps": 50000, "upload_kbps": 60000})
+
+    def test_unlimited_budget_leaves_scp_uncapped(self):
+        limits = r1setup.MigrationBatchScheduler(MagicMock()).bandwidth_limits([_plan("n1", "m-a", "m-b")])
+
+        self.assertEqual(limits["n1"], {"download_kbps": 0, "upload_kbps": 0})
+
+    def test_drain_takes_about_the_longest_move(self):
+        def run_move(plan, limits):
+            time.sleep(0.05 * plan["preflight"]["source_volume_bytes"] / GIB)
+            return {"status": "success"}
+
+        plans = [_plan(f"n{i}", "m-a", "m-b", size_gib=size) for i, size in enumerate((2, 4, 3))]
+        started = time.monotonic()
+        results = r1setup.MigrationBatchScheduler(run_move, concurrency=3).run(plans)
+        elapsed = time.monotonic() - started
+
+        self.assertEqual({result["status"] for result in results.values()}, {"success"})
+        self.assertLess(elapsed, 0.35)
+
+    def test_largest_move_starts_first_and_concurrency_is_respected(self):
+        lock = threading.Lock()
+        state = {"running": 0, "peak": 0, "order": []}
+
+        def run_move(plan, limits):
+            with lock:
+                state["order"].append(plan["instance_name"])
+                state["running"] += 1
+                state["peak"] = max(state["peak"], state["running"])
+            time.sleep(0.02)
+            with lock:
+                state["running"] -= 1
+            return {"status": "success"}
+
+        plans = [_plan("small", "m-a", "m-b", 1), _plan("big", "m-a", "m-b", 9), _plan("mid", "m-a", "m-b", 5)]
+        r1setup.MigrationBatchScheduler(run_move, concurrency=2).run(plans)
+
+        self.assertEqual(state["order"][0], "big")
+        self.assertEqual(state["peak"], 2)
+
+    def test_temp_budget_serializes_moves_that_do_not_fit_together(self):
+        lock = threading.Lock()
+        state = {"running": 0, "peak": 0}
+
+        def run_move(plan, limits):
+            with lock:
+                state["running"] += 1
+                state["peak"] = max(state["peak"], state["running"])
+            time.sleep(0.02)
+            with lock:
+                state["running"] -= 1
+            return {"status": "success"}
+
+        plans = [_plan("n1", "m-a", "m-b", 6), _plan("n2", "m-a", "m-c", 6)]
+        r1setup.MigrationBatchScheduler(run_move, concurrency=2, temp_budget_bytes=10 * GIB).run(plans)
+
+        self.assertEqual(state["peak"], 1)
+
+    def test_move_exception_is_reported_as_error(self):
+        def run_move(plan, limits):
+            raise RuntimeError("boom")
+
+        results = r1setup.MigrationBatchScheduler(run_move).run([_plan("n1", "m-a", "m-b")])
+
+        self.assertEqual(results["n1"], {"status": "error", "message": "boom"})
+
+
+class TestMigrationBatchPlanner(unittest.TestCase):
+    """Verify batch validation, resumable execution and rollback."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.app = MagicMock()
+        self.app.connection_timeout = 30
+        self.app.active_config = {"config_name": "fleet"}
+        self.app.get_fleet_state_copy = MagicMock(return_value={
+            "config_schema_version": r1setup.CONFIG_SCHEMA_VERSION,
+            "fleet": {
+                "machines": {
+                    machine_id: {
+                        "machine_id": machine_id,
+                        "ansible_host": f"10.0.0.{index}",
+                        "ansible_user": "root",
+                        "topology_mode": "expert",
+                    }
+                    for index, machine_id in enumerate(("m-a", "m-b", "m-c"), start=1)
+                },
+                "instances": {},
+            },
+        })
+        self.app.config_manager._normalize_fleet_state = lambda fleet_state: fleet_state
+        self.saved = []
+        self.app.set_migration_batch_state = MagicMock(side_effect=lambda batch: self.saved.append(batch))
+        self.planner = r1setup.MigrationPlanner(self.app)
+
+    def _stub_steps(self, planner):
+        planner._stop_source_instance_for_migration = MagicMock(return_value={"status": "success"})
+        planner._create_source_archive = MagicMock(return_value={"status": "success"})
+        planner._compute_remote_checksum = MagicMock(return_value={"status": "success", "checksum": "abc"})
+        planner._copy_from_machine = MagicMock(side_effect=self._fake_download)
+        planner._compute_local_checksum = MagicMock(return_value="abc")
+        planner._copy_to_machine = MagicMock(return_value={"status": "success"})
+        planner._prepare_target_volume_root = MagicMock(return_value={"status": "success"})
+        planner._extract_archive_on_target = MagicMock(return_value={"status": "success"})
+        planner._apply_target_runtime_definition = MagicMock(return_value={"status": "success"})
+        planner._start_target_instance = MagicMock(return_value={"status": "success"})
+        planner._verify_target_migration_health = MagicMock(return_value={
+            "status": "success", "runtime_health": "verified", "app_health": True, "app_health_status": "verified",
+        })
+        planner._cleanup_runtime_artifacts = MagicMock(return_value={"status": "success"})
+        planner._cleanup_remote_archive = MagicMock(return_value={"status": "success"})
+        planner._start_source_instance_after_rollback = MagicMock(return_value={"status": "success"})
+
+    @staticmethod
+    def _fake_download(machine_record, remote_path, local_path, **kwargs):
+        Path(local_path).write_bytes(b"archive")
+        return {"status": "success"}
+
+    def _batch(self, *plans, settings=None):
+        return {
+            "batch_id": "migration-batch-1",
+            "status": "planned",
+            "settings": settings or {"concurrency": 3},
+            "moves": {plan["instance_name"]: plan for plan in plans},
+        }
+
+    def test_validation_blocks_runtime_collisions_between_moves(self):
+        batch = self._batch(
+            _plan("n1", "m-a", "m-b", service_name="edge_node"),
+            _plan("n2", "m-a", "m-b", service_name="edge_node"),
+            _plan("n3", "m-a", "m-c", service_name="edge_node"),
+        )
+
+        validated = self.planner._validate_migration_batch(batch)
+
+        self.assertEqual(validated["status"], "blocked")
+        self.assertEqual(validated["moves"]["n1"]["status"], "blocked")
+        self.assertIn("n2", validated["moves"]["n1"]["validation"]["batch_errors"][0])
+        self.assertEqual(validated["moves"]["n3"]["status"], "planned")
+
+    def test_validation_blocks_standard_target_receiving_several_moves(self):
+        fleet_state = self.app.get_fleet_state_copy.return_value
+        fleet_state["fleet"]["machines"]["m-b"]["topology_mode"] = "standard"
+
+        validated = self.planner._validate_migration_batch(
+            self._batch(_plan("n1", "m-a", "m-b"), _plan("n2", "m-a", "m-b")),
+        )
+
+        self.assertEqual(validated["status"], "blocked")
+        self.assertIn("Standard-mode", validated["moves"]["n2"]["validation"]["batch_errors"][0])
+
+    def test_execute_moves_all_instances_and_finalizes_assignments(self):
+        self._stub_steps(self.planner)
+        batch = self._batch(
+            _plan("n1", "m-a", "m-b", temp_dir=self.tmp.name),
+            _plan("n2", "m-a", "m-c", temp_dir=self.tmp.name),
+            settings={"concurrency": 2, "source_bandwidth_kbps": 80000},
+        )
+
+        outcome = self.planner.execute_migration_batch(batch)
+
+        self.assertEqual(outcome["status"], "executed")
+        self.assertEqual(
+            sorted(call.args[0] for call in self.app.finalize_instance_migration.call_args_list), ["n1", "n2"],
+        )
+        self.assertEqual(
+            {call.kwargs["bandwidth_kbps"] for call in self.planner._copy_from_machine.call_args_list}, {40000},
+        )
+        self.assertFalse(any(Path(self.tmp.name).iterdir()))
+        self.assertEqual(self.saved[-1]["moves"]["n1"]["last_step"], "target_verified")
+        self.assertEqual(self.saved[-1]["moves"]["n2"]["status"], "executed")
+
+    def test_moves_to_one_target_take_turns_from_apply_to_verification(self):
+        self._stub_steps(self.planner)
+        active, overlaps = [], []
+
+        def runtime_step(plan, **kwargs):
+            active.append(plan["instance_name"])
+            if len(active) > 1:
+                overlaps.append(tuple(active))
+            time.sleep(0.02)
+            active.remove(plan["instance_name"])
+            return {"status": "success"}
+
+        self.planner._apply_target_runtime_definition = MagicMock(side_effect=runtime_step)
+        self.planner._start_target_instance = MagicMock(side_effect=runtime_step)
+        batch = self._batch(
+            _plan("n1", "m-a", "m-b", temp_dir=self.tmp.name, service_name="edge_node_1"),
+            _plan("n2", "m-c", "m-b", temp_dir=self.tmp.name, service_name="edge_node_2"),
+            settings={"concurrency": 2},
+        )
+
+        outcome = self.planner.execute_migration_batch(batch)
+
+        self.assertEqual(outcome["status"], "executed")
+        self.assertEqual(overlaps, [])
+        self.assertEqual(self.planner._apply_target_runtime_definition.call_count, 2)
+
+    def test_resume_skips_completed_moves_and_steps(self):
+        self._stub_steps(self.planner)
+        done = dict(_plan("n1", "m-a", "m-b", temp_dir=self.tmp.name), status="executed", last_step="target_verified")
+        interrupted = dict(
+            _plan("n2", "m-a", "m-c", temp_dir=self.tmp.name),
+            status="executing", last_step="archive_uploaded", source_checksum="abc",
+        )
+
+        outcome = self.planner.execute_migration_batch(self._batch(done, interrupted))
+
+        self.assertEqual(outcome["status"], "executed")
+        self.planner._stop_source_instance_for_migration.assert_not_called()
+        self.planner._copy_to_machine.assert_not_called()
+        self.planner._extract_archive_on_target.assert_called_once()
+        self.app.finalize_instance_migration.assert_called_once()
+        self.assertEqual(self.app.finalize_instance_migration.call_args.args[0], "n2")
+
+    def test_failed_move_rolls_back_and_restarts_source_while_others_finish(self):
+        self._stub_steps(self.planner)
+        self.planner._extract_archive_on_target = MagicMock(
+            side_effect=lambda machine, archive, volume: (
+                {"status": "error", "message": "disk full"} if machine["machine_id"] == "m-b" else {"status": "success"}
+            )
+        )
+        batch = self._batch(
+            _plan("n1", "m-a", "m-b", temp_dir=self.tmp.name),
+            _plan("n2", "m-a", "m-c", temp_dir=self.tmp.name),
+        )
+
+        outcome = self.planner.execute_migration_batch(batch)
+
+        self.assertEqual(outcome["status"], "partial")
+        self.assertEqual(outcome["results"]["n1"]["status"], "error")
+        self.assertTrue(outcome["results"]["n1"]["rolled_back"])
+        self.assertEqual(outcome["results"]["n2"]["status"], "success")
+        self.planner._start_source_instance_after_rollback.assert_called_once_with("n1")
+        failed_move = outcome["batch"]["moves"]["n1"]
+        self.assertEqual(failed_move["status"], "rolled_back")
+        self.assertEqual(failed_move["last_step"], "target_prepared")
+        self.assertEqual(failed_move["last_error"], "disk full")
+
+
+if __name__ == "__main__":
+    unittest.main()
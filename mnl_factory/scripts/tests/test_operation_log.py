@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Tests for the buffered, indexed operation log."""
+
+import json
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from tests.support import r1setup
+
+
+class _FakeClock:
+    """Wall and monotonic clock advanced by the test."""
+
+    def __init__(self):
+        self.wall = datetime(2026, 9, 1, 12, 0, 0)
+        self.monotonic = 0.0
+
+    def now(self):
+        return self.wall
+
+    def __call__(self):
+        return self.monotonic
+
+    def advance(self, **kwargs):
+        delta = timedelta(**kwargs)
+        self.wall += delta
+        self.monotonic += delta.total_seconds()
+
+
+class TestOperationLog(unittest.TestCase):
+    """Verify buffering, sealing into indexed segments and queries."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.log_dir = Path(self.tmp.name) / "logs"
+        self.clock = _FakeClock()
+        self.log = r1setup.OperationLog(
+            self.log_dir, flush_interval=3600, clock=self.clock, now=self.clock.now,
+        )
+        self.addCleanup(self.log.flush)
+
+    def _lines(self):
+        return self.log.active_path.read_text().splitlines() if self.log.active_path.exists() else []
+
+    def test_events_are_buffered_until_a_failure_or_full_buffer(self):
+        self.log.append("migration_execution", "started", {"plan_id": "p1"})
+        self.assertEqual(self._lines(), [])
+
+        self.log.append("migration_execution", "failed", {"plan_id": "p1"})
+
+        self.assertEqual([json.loads(line)["status"] for line in self._lines()], ["started", "failed"])
+
+    def test_maintenance_runs_periodically_not_on_every_flush(self):
+        self.log.append("deploy", "failed")
+        self.log.maintain = MagicMock()
+
+        self.log.append("deploy", "failed")
+        self.log.maintain.assert_not_called()
+        self.clock.advance(seconds=self.log.MAINTENANCE_INTERVAL)
+        self.log.append("deploy", "failed")
+
+        self.log.maintain.assert_called_once()
+
+    def test_previous_day_is_sealed_into_compressed_indexed_blocks(self):
+        self.log.BLOCK_LINES = 2
+        for index in range(5):
+            self.log.append("migration_execution" if index % 2 else "migration_rollback", "success", {"n": index})
+        self.log.flush()
+        self.clock.advance(days=1)
+
+        self.log.maintain()
+
+        self.assertFalse(self.log.active_path.exists())
+        segments = self.log.segments()
+        self.assertEqual(len(segments), 1)
+        self.assertEqual(segments[0]["name"], "operations_20260901_120000.log.gz")
+        self.assertEqual(segments[0]["count"], 5)
+        index = json.loads((self.log_dir / "operations_20260901_120000.idx.json").read_text())
+        self.assertEqual([block["count"] for block in index["blocks"]], [2, 2, 1])
+        self.assertEqual(index["blocks"][2]["operation_types"], ["migration_rollback"])
+
+    def test_query_filters_by_type_status_and_time_across_segments(self):
+        self.log.append("migration_execution", "failed", {"plan_id": "old"})
+        self.clock.advance(days=1)
+        self.log.maintain()
+        self.log.append("migration_batch_move", "failed", {"plan_id": "new"})
+        self.log.append("migration_execution", "success", {"plan_id": "ok"})
+
+        failed = self.log.query(operation_type="migration*", status="failed")
+        recent = self.log.query(since="2026-09-02T00:00:00")
+
+        self.assertEqual([entry["details"]["plan_id"] for entry in failed], ["old", "new"])
+        self.assertEqual([entry["details"]["plan_id"] for entry in recent], ["new", "ok"])
+        self.assertEqual(self.log.query(limit=1)[0]["details"]["plan_id"], "ok")
+
+    def test_legacy_rotated_logs_are_indexed_and_expired_segments_removed(self):
+        self.log_dir.mkdir()
+        legacy = self.log_dir / "operations_20260820_000000.log"
+        legacy.write_text(json.dumps({
+            "logged_at": "2026-08-20T00:00:00", "operation_type": "migration_rollback", "status": "success",
+        }) + "\n")
+
+        self.log.maintain()
+        self.assertEqual(len(self.log.query(operation_type="migration_rollback")), 1)
+        self.clock.advance(days=20)
+        self.log.maintain()
+
+        self.assertEqual(self.log.segments(), [])
+        self.assertEqual(list(self.log_dir.iterdir()), [])
+
+    def test_parse_query_terms(self):
+        filters = self.log.parse_query_terms(["type=migration*", "status=failed", "days=30", "limit=5"])
+
+        self.assertEqual(filters["operation_type"], "migration*")
+        self.assertEqual(filters["since"], "2026-08-02T12:00:00")
+        self.assertEqual(filters["limit"], 5)
+        with self.assertRaises(ValueError):
+            self.log.parse_query_terms(["colour=red"])
+
+
+if __name__ == "__main__":
+    unittest.main()
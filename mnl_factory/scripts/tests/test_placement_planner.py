@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""Tests for resource-aware instance placement."""
+
+import copy
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from tests.support import r1setup
+
+
+def _specs(cpu, memory, disk=None, gpus=None):
+    specs = {"cpu_total": cpu, "memory_gb_total": memory}
+    if disk is not None:
+        specs["disk_gb_free"] = disk
+    if gpus is not None:
+        specs["gpu_total"] = gpus
+    return specs
+
+
+class TestInstancePlacementPlanner(unittest.TestCase):
+    """Verify capacity math and the spread/pack policies."""
+
+    def test_capacity_is_bounded_by_the_scarcest_resource(self):
+        planner = r1setup.InstancePlacementPlanner(cpu=4, memory_gib=16, disk_gib=100, gpus=1)
+
+        self.assertEqual(planner.machine_capacity(_specs(32, 128.0, disk=250.0, gpus=4)), 2)
+        self.assertEqual(planner.machine_capacity(_specs(32, 128.0, disk=900.0, gpus=1)), 1)
+
+    def test_unrequired_resources_are_not_needed_in_specs(self):
+        planner = r1setup.InstancePlacementPlanner(cpu=4, memory_gib=16)
+
+        self.assertEqual(planner.machine_capacity(_specs(16, 64.0)), 4)
+        self.assertIsNone(r1setup.InstancePlacementPlanner(disk_gib=50).machine_capacity(_specs(16, 64.0)))
+        self.assertIsNone(planner.machine_capacity(None))
+
+    def test_spread_balances_utilization(self):
+        planner = r1setup.InstancePlacementPlanner(cpu=4, memory_gib=16)
+
+        plan = planner.plan({"big": _specs(32, 128.0), "small": _specs(8, 32.0)}, 5)
+
+        self.assertEqual(plan["status"], "success")
+        self.assertEqual(plan["assignments"], {"big": 4, "small": 1})
+
+    def test_pack_fills_largest_machines_first(self):
+        planner = r1setup.InstancePlacementPlanner(cpu=4, memory_gib=16, policy="pack")
+
+        plan = planner.plan({
+            "m-1": _specs(8, 32.0),
+            "m-2": _specs(32, 128.0),
+            "m-3": _specs(16, 64.0),
+        }, 10)
+
+        self.assertEqual(plan["assignments"], {"m-1": 0, "m-2": 8, "m-3": 2})
+
+    def test_insufficient_capacity_reports_unplaced_and_skipped(self):
+        planner = r1setup.InstancePlacementPlanner(cpu=4, memory_gib=16)
+
+        plan = planner.plan({"m-1": _specs(8, 32.0), "m-2": None}, 5)
+
+        self.assertEqual(plan["status"], "insufficient_capacity")
+        self.assertEqual(plan["placed"], 2)
+        self.assertEqual(plan["unplaced"], 3)
+        self.assertEqual(plan["skipped"], ["m-2"])
+
+    def test_unknown_policy_is_rejected(self):
+        with self.assertRaises(ValueError):
+            r1setup.InstancePlacementPlanner(policy="random")
+
+    def test_plans_thousands_of_machines_quickly(self):
+        machines = {f"m-{index:05d}": _specs(8 + 4 * (index % 8), 32.0 + 16 * (index % 8)) for index in range(5000)}
+
+        started = time.monotonic()
+        plan = r1setup.InstancePlacementPlanner(cpu=4, memory_gib=16).plan(machines, 20000)
+        elapsed = time.monotonic() - started
+
+        self.assertEqual(plan["status"], "success")
+        self.assertEqual(sum(plan["assignments"].values()), 20000)
+        self.assertLess(elapsed, 2.0)
+
+
+class TestAdvancedPlacementPrompt(unittest.TestCase):
+    """Verify the advanced onboarding flow can use the planner."""
+
+    def setUp(self):
+        self.cm = r1setup.ConfigurationManager.__new__(r1setup.ConfigurationManager)
+        self.cm.app = MagicMock()
+        self.cm.fleet_state = {
+            "config_schema_version": r1setup.CONFIG_SCHEMA_VERSION,
+            "fleet": {"machines": {
+                "m-1": {"machine_id": "m-1", "machine_specs": _specs(16, 64.0), "instance_names": []},
+                "m-2": {"machine_id": "m-2", "machine_specs": _specs(8, 32.0), "instance_names": []},
+                "m-3": {"machine_id": "m-3", "instance_names": []},
+            }, "instances": {}},
+        }
+        self.cm.get_fleet_state_copy = lambda: copy.deepcopy(self.cm.fleet_state)
+
+    def test_accepted_plan_covers_specced_machines_and_prompts_the_rest(self):
+        # auto plan, total, cpu, ram, disk, gpu, policy, confirm, manual count for m-3
+        self.cm.app.get_input = MagicMock(side_effect=["y", "5", "4", "16", "0", "0", "spread", "Y", "2"])
+
+        counts = self.cm._collect_advanced_instance_counts(["m-1", "m-2", "m-3"])
+
+        self.assertEqual(counts, {"m-1": 3, "m-2": 2, "m-3": 2})
+
+    def test_declining_keeps_per_machine_prompts(self):
+        self.cm.app.get_input = MagicMock(side_effect=["n", "4", "2", "1"])
+
+        counts = self.cm._collect_advanced_instance_counts(["m-1", "m-2", "m-3"])
+
+        self.assertEqual(counts, {"m-1": 4, "m-2": 2, "m-3": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -413,6 +413,61 @@ class TestDeploySetupEndToEnd(unittest.TestCase):
             update_metadata.assert_called_once_with("full")
             app.record_install_success.assert_called_once_with(["node-a"], "gpu", "user")
 
+    def test_unchanged_install_fingerprint_skips_machine_prepare(self):
+        with tempfile.TemporaryDirectory() as td:
+            app = self._prep_env(td, ["node-a"])
+            app.group_host_names_by_machine.return_value = {
+                "root@10.0.0.1:22": {"representative_host": "node-a", "host_names": ["node-a"]},
+            }
+            app.get_collection_version.return_value = "1.5.3"
+            app._run_machine_probe.return_value = {"status": "success", "stdout": "os=ubuntu:22.04\n"}
+            fingerprint = r1setup.DeploymentService._compose_prepare_fingerprint(
+                "os=ubuntu:22.04\n", "cpu", "n/a", "1.5.3",
+                machine_id="root@10.0.0.1:22", ansible_host="10.0.0.1",
+            )
+            hosts = app.inventory["all"]["children"]["gpu_nodes"]["hosts"]
+            hosts["node-a"][r1setup.INSTALL_PREPARE_FINGERPRINT_FIELD] = fingerprint
+            app.run_generated_playbook.side_effect = [
+                (True, "ok", ["node-a"], {"all": {"children": {"gpu_nodes": {"hosts": {"node-a": {}}}}}}),
+            ]
+
+            self._run_deploy(app, variant="cpu", manage_drivers=False)
+
+            self.assertEqual(app.run_generated_playbook.call_count, 1)
+            self.assertFalse(app.run_generated_playbook.call_args.kwargs["machine_scope"])
+            app.record_install_success.assert_called_once_with(["node-a"], "cpu", "n/a")
+            app.record_prepare_fingerprints.assert_called_once_with({"node-a": fingerprint})
+
+    def test_changed_install_fingerprint_prepares_only_that_machine(self):
+        with tempfile.TemporaryDirectory() as td:
+            app = self._prep_env(td, ["node-a", "node-b"])
+            app.get_collection_version.return_value = "1.5.3"
+            app._run_machine_probe.return_value = {"status": "success", "stdout": "os=ubuntu:22.04\n"}
+            hosts = app.inventory["all"]["children"]["gpu_nodes"]["hosts"]
+            hosts["node-a"][r1setup.INSTALL_PREPARE_FINGERPRINT_FIELD] = (
+                r1setup.DeploymentService._compose_prepare_fingerprint(
+                    "os=ubuntu:22.04\n", "gpu", "r1setup", "1.5.3",
+                    machine_id="root@10.0.0.1:22", ansible_host="10.0.0.1",
+                )
+            )
+            # node-b's machine is identical but a recorded fingerprint never
+            # carries over from another machine.
+            hosts["node-b"][r1setup.INSTALL_PREPARE_FINGERPRINT_FIELD] = hosts["node-a"][
+                r1setup.INSTALL_PREPARE_FINGERPRINT_FIELD
+            ]
+            app.run_generated_playbook.side_effect = [
+                (True, "ok", ["node-b"], {"all": {"children": {"gpu_nodes": {"hosts": {"node-b": {}}}}}}),
+                (True, "ok", ["node-a", "node-b"],
+                 {"all": {"children": {"gpu_nodes": {"hosts": {"node-a": {}, "node-b": {}}}}}}),
+            ]
+
+            self._run_deploy(app, variant="gpu", manage_drivers=True)
+
+            prepare_call, apply_call = app.run_generated_playbook.call_args_list
+            self.assertEqual(prepare_call.args[1], ["node-b"])
+            self.assertTrue(prepare_call.kwargs["machine_scope"])
+            self.assertEqual(apply_call.args[1], ["node-a", "node-b"])
+
     def test_partial_fleet_failure_records_attempt_for_failed_hosts(self):
         with tempfile.TemporaryDirectory() as td:
             app = self._prep_env(td, ["node-a", "node-b"])
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""Tests for health-gated rolling restarts and service updates."""
+
+import itertools
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from tests.support import r1setup
+
+
+class _FakeClock:
+    """Monotonic clock that only advances when the executor sleeps."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestRollingWaveExecutor(unittest.TestCase):
+    """Verify wave planning, health polling and halting."""
+
+    HOSTS = ["node-1", "node-2", "node-3", "node-4", "node-5"]
+
+    def setUp(self):
+        self.clock = _FakeClock()
+        self.applied = []
+
+    def _executor(self, check_health, **kwargs):
+        def apply_wave(wave):
+            self.applied.append(list(wave))
+            return True
+
+        options = {"wave_size": 2, "health_timeout": 60, "poll_interval": 10}
+        options.update(kwargs)
+        return r1setup.RollingWaveExecutor(
+            apply_wave, check_health, sleep=self.clock.sleep, clock=self.clock, **options,
+        )
+
+    def test_plan_waves_bounds_every_wave_by_wave_size(self):
+        waves = r1setup.RollingWaveExecutor.plan_waves(self.HOSTS, 2)
+
+        self.assertEqual(waves, [["node-1", "node-2"], ["node-3", "node-4"], ["node-5"]])
+
+    def test_all_waves_run_when_every_node_turns_healthy(self):
+        result = self._executor(lambda hosts: set(hosts)).run(self.HOSTS)
+
+        self.assertEqual(result["status"], "success")
+        self.assertEqual(len(self.applied), 3)
+        self.assertEqual(result["healthy"], self.HOSTS)
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_polls_until_slow_node_reports_healthy(self):
+        checks = []
+
+        def check_health(hosts):
+            checks.append(list(hosts))
+            return set(hosts) if len(checks) >= 3 else {h for h in hosts if h != "node-2"}
+
+        result = self._executor(check_health).run(self.HOSTS[:2])
+
+        self.assertEqual(result["status"], "success")
+        self.assertEqual(checks[1:], [["node-2"], ["node-2"]])
+        self.assertEqual(self.clock.sleeps, [10, 10])
+
+    def test_unhealthy_wave_halts_remaining_waves(self):
+        result = self._executor(lambda hosts: {h for h in hosts if h != "node-3"}).run(self.HOSTS)
+
+        self.assertEqual(result["status"], "halted")
+        self.assertEqual(self.applied, [["node-1", "node-2"], ["node-3", "node-4"]])
+        self.assertEqual(result["unhealthy"], ["node-3"])
+        self.assertEqual(result["skipped"], ["node-5"])
+        self.assertEqual(self.clock.now, 60)
+
+    def test_max_unavailable_tolerates_failures_within_budget(self):
+        result = self._executor(
+            lambda hosts: {h for h in hosts if h != "node-3"}, max_unavailable=1,
+        ).run(self.HOSTS)
+
+        self.assertEqual(result["status"], "degraded")
+        self.assertEqual(len(self.applied), 3)
+        self.assertEqual(result["skipped"], [])
+
+    def test_failed_playbook_gets_a_single_health_check(self):
+        check_health = MagicMock(return_value=set())
+        executor = r1setup.RollingWaveExecutor(
+            lambda wave: False, check_health, wave_size=2,
+            sleep=self.clock.sleep, clock=self.clock,
+        )
+
+        result = executor.run(self.HOSTS)
+
+        self.assertEqual(result["status"], "halted")
+        self.assertEqual(check_health.call_count, 1)
+        self.assertEqual(self.clock.sleeps, [])
+        self.assertFalse(result["waves"][0]["applied"])
+
+
+class TestRollingServiceTemplateApply(unittest.TestCase):
+    """Verify service template updates go through waves when enabled."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        config_dir = Path(self.tmp.name)
+        (config_dir / "playbooks").mkdir()
+        (config_dir / "playbooks" / "customize_service.yml").write_text("---\n")
+
+        self.app = r1setup.R1Setup.__new__(r1setup.R1Setup)
+        self.app.config_dir = config_dir
+        self.app.settings_manager = r1setup.SettingsManager.__new__(r1setup.SettingsManager)
+        self.app.settings_manager.app = self.app
+        self.app.settings_manager.settings = dict(r1setup.SettingsManager.DEFAULT_SETTINGS)
+        self.app.print_colored = MagicMock()
+        self.app.print_debug = MagicMock()
+        self.app.wait_for_enter = MagicMock()
+        self.app._ensure_helper_mode_supported_for_hosts = MagicMock(return_value=True)
+        self.app._update_node_status = MagicMock()
+        self.app.record_service_file_version = MagicMock()
+        self.app._refresh_service_update_status = MagicMock()
+        self.app.run_generated_playbook = MagicMock(return_value=(True, "", [], {}))
+        self.hosts = ["node-1", "node-2", "node-3"]
+
+    def _apply(self):
+        return self.app._apply_service_template_to_hosts(
+            self.hosts,
+            overrides=None,
+            last_applied_action="update_service_file",
+            progress_message="Applying...",
+            success_message="Applied.",
+            failure_message="Failed.",
+        )
+
+    def test_wave_size_zero_keeps_single_playbook_run(self):
+        self.assertTrue(self._apply())
+
+        self.app.run_generated_playbook.assert_called_once()
+        self.assertEqual(self.app.run_generated_playbook.call_args.args[1], self.hosts)
+
+    def test_rolling_update_halts_after_unhealthy_wave(self):
+        self.app.settings_manager.settings["rolling_wave_size"] = 1
+        self.app._check_rolling_wave_health = MagicMock(
+            side_effect=lambda hosts: set(hosts) if hosts == ["node-1"] else set()
+        )
+
+        with patch("time.sleep"), patch("time.monotonic", side_effect=itertools.count(0, 30)):
+            self.assertFalse(self._apply())
+
+        waves = [call.args[1] for call in self.app.run_generated_playbook.call_args_list]
+        self.assertEqual(waves, [["node-1"], ["node-2"]])
+        self.assertEqual(
+            [call.args[0] for call in self.app.record_service_file_version.call_args_list],
+            [["node-1"], ["node-2"]],
+        )
+        self.app._update_node_status.assert_any_call("node-1", "running")
+        self.app._update_node_status.assert_any_call("node-2", "error")
+        self.assertNotIn(
+            "node-3", [call.args[0] for call in self.app._update_node_status.call_args_list]
+        )
+        self.app._refresh_service_update_status.assert_not_called()
+
+
+class TestRollingWaveHealthCheck(unittest.TestCase):
+    """Verify the health check needs both a running unit and node info."""
+
+    def test_only_running_nodes_with_node_info_are_healthy(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        (Path(tmp.name) / "playbooks").mkdir()
+        (Path(tmp.name) / "playbooks" / "get_node_info.yml").write_text("---\n")
+        app = r1setup.R1Setup.__new__(r1setup.R1Setup)
+        app.config_dir = Path(tmp.name)
+        app.settings_manager = MagicMock(connection_timeout=30)
+        app._get_real_time_node_status = MagicMock(return_value={
+            "node-1": {"status": "running"},
+            "node-2": {"status": "running"},
+            "node-3": {"status": "stopped"},
+        })
+        app.run_generated_playbook = MagicMock(return_value=(True, "output", [], {}))
+        app._parse_node_info_output = MagicMock(return_value={
+            "node-1": {"status": "success", "data": {}},
+            "node-2": {"status": "unreachable", "data": None},
+        })
+
+        healthy = app._check_rolling_wave_health(["node-1", "node-2", "node-3"])
+
+        self.assertEqual(healthy, {"node-1"})
+        app._get_real_time_node_status.assert_called_once_with(["node-1", "node-2", "node-3"])
+        self.assertEqual(app.run_generated_playbook.call_args.args[1], ["node-1", "node-2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
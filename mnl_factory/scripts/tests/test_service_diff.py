@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Tests for render-and-diff service updates."""
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from tests.support import r1setup
+
+
+UNIT_BEFORE = "[Service]\nRestartSec=60\nExecStart=/usr/bin/docker run ratio1/edge_node:mainnet\n"
+UNIT_AFTER = "[Service]\nRestartSec=30\nExecStart=/usr/bin/docker run ratio1/edge_node:mainnet\n"
+
+
+class TestServiceChangePlan(unittest.TestCase):
+    """Verify the batched check-mode diff is turned into a per-host plan."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        config_dir = Path(self.tmp.name)
+        (config_dir / "playbooks").mkdir()
+        (config_dir / "playbooks" / "service_diff.yml").write_text("---\n")
+        (config_dir / "playbooks" / "customize_service.yml").write_text("---\n")
+
+        self.app = r1setup.R1Setup.__new__(r1setup.R1Setup)
+        self.app.config_dir = config_dir
+        self.app.settings_manager = MagicMock(connection_timeout=30, playbook_timeout=1800, rolling_wave_size=0)
+        self.app.print_colored = MagicMock()
+        self.app.print_debug = MagicMock()
+        self.app.wait_for_enter = MagicMock()
+        self.app._ensure_helper_mode_supported_for_hosts = MagicMock(return_value=True)
+        self.app._update_node_status = MagicMock()
+        self.app.record_service_file_version = MagicMock()
+        self.app._refresh_service_update_status = MagicMock()
+        self.summaries = {}
+        self.applied_hosts = []
+        self.app.run_generated_playbook = MagicMock(side_effect=self._run_playbook)
+
+    def _run_playbook(self, playbook_path, host_names, **kwargs):
+        if playbook_path.name == "service_diff.yml":
+            fetched_dir = Path(kwargs["extra_vars"]["r1setup_fetched_metadata_dir"])
+            for host_name in host_names:
+                if host_name in self.summaries:
+                    (fetched_dir / f"service-diff-{host_name}.json").write_text(json.dumps(self.summaries[host_name]))
+        else:
+            self.applied_hosts.append(list(host_names))
+        return True, "", list(host_names), {}
+
+    def _summary(self, unit_changed=False, env_changed=False):
+        return {
+            "service_exists": True,
+            "unit_changed": unit_changed,
+            "env_changed": env_changed,
+            "unit_diff": [{"before": UNIT_BEFORE, "after": UNIT_AFTER}] if unit_changed else [],
+            "env_diff": [],
+        }
+
+    def test_plan_classifies_changed_unchanged_and_unknown_hosts(self):
+        self.summaries = {
+            "node-1": self._summary(unit_changed=True),
+            "node-2": self._summary(),
+            "node-3": self._summary(env_changed=True),
+        }
+
+        plan = self.app._plan_service_template_changes(
+            ["node-1", "node-2", "node-3", "node-4"], {"mnl_service_restart_sec": 30},
+        )
+
+        self.assertEqual(self.app.run_generated_playbook.call_count, 1)
+        extra_vars = self.app.run_generated_playbook.call_args.kwargs["extra_vars"]
+        self.assertEqual(extra_vars["mnl_service_restart_sec"], 30)
+        self.assertEqual(plan["node-1"]["status"], "changed")
+        self.assertIn("-RestartSec=60", plan["node-1"]["diff"])
+        self.assertIn("+RestartSec=30", plan["node-1"]["diff"])
+        self.assertEqual(plan["node-2"]["status"], "unchanged")
+        self.assertFalse(plan["node-3"]["unit_changed"])
+        self.assertEqual(plan["node-4"]["status"], "unknown")
+        self.assertFalse(Path(extra_vars["r1setup_fetched_metadata_dir"]).exists())
+
+    def test_apply_only_touches_hosts_whose_definition_differs(self):
+        self.summaries = {
+            "node-1": self._summary(unit_changed=True),
+            "node-2": self._summary(),
+        }
+
+        result = self.app._apply_service_template_to_hosts(
+            ["node-1", "node-2"],
+            overrides=None,
+            last_applied_action="update_service_file",
+            progress_message="Applying...",
+            success_message="Applied.",
+            failure_message="Failed.",
+        )
+
+        self.assertTrue(result)
+        self.assertEqual(self.applied_hosts, [["node-1"]])
+        self.app.record_service_file_version.assert_any_call(["node-2"])
+        self.app.record_service_file_version.assert_any_call(["node-1"])
+
+    def test_apply_is_a_no_op_when_nothing_differs(self):
+        self.summaries = {"node-1": self._summary(), "node-2": self._summary()}
+
+        result = self.app._apply_service_template_to_hosts(
+            ["node-1", "node-2"],
+            overrides=None,
+            last_applied_action="customize_service",
+            progress_message="Applying...",
+            success_message="Applied.",
+            failure_message="Failed.",
+        )
+
+        self.assertTrue(result)
+        self.assertEqual(self.applied_hosts, [])
+        self.app._update_node_status.assert_not_called()
+
+    def test_dry_run_prompt_shows_diff_before_confirming(self):
+        self.summaries = {"node-1": self._summary(unit_changed=True)}
+        self.app.get_input = MagicMock(side_effect=["d", "n"])
+
+        confirmed = self.app._confirm_service_template_apply("Proceed?", ["node-1"])
+
+        self.assertFalse(confirmed)
+        self.assertEqual(self.applied_hosts, [])
+        printed = [call.args[0] for call in self.app.print_colored.call_args_list if call.args]
+        self.assertIn("   +RestartSec=30", printed)
+
+
+if __name__ == "__main__":
+    unittest.main()
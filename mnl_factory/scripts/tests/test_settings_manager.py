@@ -77,3 +77,97 @@ class TestConnectionTimeout(unittest.TestCase):
         sm = self._make_settings_manager()
         del sm.settings["connection_timeout"]
         self.assertEqual(sm.connection_timeout, 30)
+
+
+class TestImageDistribution(unittest.TestCase):
+    """Tests for the image distribution preference and its Ansible extra-vars."""
+
+    def _make_settings_manager(self, **overrides):
+        sm = r1setup.SettingsManager.__new__(r1setup.SettingsManager)
+        sm.app = MagicMock()
+        sm.settings = dict(r1setup.SettingsManager.DEFAULT_SETTINGS)
+        sm.settings.update(overrides)
+        return sm
+
+    def test_default_registry_adds_no_extra_vars(self):
+        sm = self._make_settings_manager()
+        self.assertEqual(sm.image_distribution, "registry")
+        self.assertEqual(sm.build_image_distribution_extra_vars(), {})
+
+    def test_unknown_mode_falls_back_to_registry(self):
+        sm = self._make_settings_manager(image_distribution="torrent")
+        self.assertEqual(sm.image_distribution, "registry")
+
+    def test_controller_mode(self):
+        sm = self._make_settings_manager(image_distribution="controller")
+        self.assertEqual(sm.build_image_distribution_extra_vars(), {"mnl_image_distribution_cli": "controller"})
+
+    def test_mirror_mode_passes_mirror_url(self):
+        sm = self._make_settings_manager(image_distribution="mirror", registry_mirror="http://10.0.0.2:5000")
+        self.assertEqual(
+            sm.build_image_distribution_extra_vars(),
+            {"mnl_image_distribution_cli": "mirror", "mnl_docker_registry_mirror_cli": "http://10.0.0.2:5000"},
+        )
+
+    def test_mirror_mode_without_url_degrades_to_registry(self):
+        sm = self._make_settings_manager(image_distribution="mirror")
+        self.assertEqual(sm.build_image_distribution_extra_vars(), {})
+
+    def test_instance_extra_vars_carry_distribution_mode(self):
+        app = r1setup.R1Setup.__new__(r1setup.R1Setup)
+        app.get_collection_version = MagicMock(return_value="1.3.30")
+        app.settings_manager = self._make_settings_manager(image_distribution="controller")
+
+        payload = app.build_instance_extra_vars("deploy", {"skip_gpu": True})
+
+        self.assertEqual(payload["mnl_image_distribution_cli"], "controller")
+        self.assertEqual(payload["r1setup_execution_scope"], "instance")
+
+
+class TestPackageCacheProxy(unittest.TestCase):
+    """Tests for the apt package cache proxy preference."""
+
+    def _make_settings_manager(self, **overrides):
+        sm = r1setup.SettingsManager.__new__(r1setup.SettingsManager)
+        sm.app = MagicMock()
+        sm.settings = dict(r1setup.SettingsManager.DEFAULT_SETTINGS)
+        sm.settings.update(overrides)
+        return sm
+
+    def test_proxy_disabled_by_default(self):
+        self.assertEqual(self._make_settings_manager().build_package_cache_extra_vars(), {})
+
+    def test_machine_extra_vars_carry_proxy(self):
+        app = r1setup.R1Setup.__new__(r1setup.R1Setup)
+        app.settings_manager = self._make_settings_manager(apt_proxy="http://10.0.0.2:3142")
+
+        payload = app.build_machine_extra_vars({"skip_gpu": True})
+
+        self.assertEqual(payload["mnl_apt_proxy_url_cli"], "http://10.0.0.2:3142")
+        self.assertEqual(payload["r1setup_execution_scope"], "machine")
+        self.assertTrue(payload["skip_gpu"])
+
+
+class TestRollingRestartSettings(unittest.TestCase):
+    """Tests for the rolling wave restart preferences."""
+
+    def _make_settings_manager(self, **overrides):
+        sm = r1setup.SettingsManager.__new__(r1setup.SettingsManager)
+        sm.app = MagicMock()
+        sm.settings = dict(r1setup.SettingsManager.DEFAULT_SETTINGS)
+        sm.settings.update(overrides)
+        return sm
+
+    def test_rolling_disabled_by_default(self):
+        sm = self._make_settings_manager()
+        self.assertEqual(sm.rolling_wave_size, 0)
+        self.assertEqual(sm.rolling_max_unavailable, 0)
+        self.assertEqual(sm.rolling_health_timeout, 300)
+
+    def test_invalid_values_are_sanitized(self):
+        sm = self._make_settings_manager(
+            rolling_wave_size="abc", rolling_max_unavailable=-2, rolling_health_timeout=5,
+        )
+        self.assertEqual(sm.rolling_wave_size, 0)
+        self.assertEqual(sm.rolling_max_unavailable, 0)
+        self.assertEqual(sm.rolling_health_timeout, 60)
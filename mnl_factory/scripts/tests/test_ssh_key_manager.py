@@ -1,7 +1,10 @@
 #!/usr/bin/env python3
 """Tests for SSH key management helpers."""
 
+import os
 import tempfile
+import threading
+import time
 import unittest
 from pathlib import Path
 from unittest.mock import MagicMock, patch
@@ -278,5 +281,93 @@ class TestSSHKeyManagerInventoryUpdates(unittest.TestCase):
         self.assertTrue(host["r1setup_ssh_requires_revalidation"])
 
 
+class TestSSHKeyManagerParallelVerification(unittest.TestCase):
+    """Tests for concurrent login checks and memoized key derivation."""
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+        self.key_path = Path(self.tempdir.name) / "id_ed25519"
+        self.key_path.write_text("private-key")
+        self.app = MagicMock()
+        self.app.inventory = make_inventory({
+            f"node-{index}": {
+                "ansible_host": f"10.0.1.{index}",
+                "ansible_user": "root",
+                "ansible_ssh_private_key_file": str(self.key_path),
+                "r1setup_ssh_auth_mode": r1setup.SSH_AUTH_MODE_KEY_CONFIGURED_LEGACY,
+            }
+            for index in range(6)
+        })
+        self.hosts = self.app.inventory["all"]["children"]["gpu_nodes"]["hosts"]
+        self.manager = r1setup.SSHKeyManager(self.app)
+
+    @patch("tests.support.r1setup.subprocess.run")
+    def test_derive_public_key_is_memoized_per_path_and_mtime(self, mock_run):
+        mock_run.return_value = MagicMock(returncode=0, stdout="ssh-ed25519 AAAAC3NzaC1lZDI1NTE5AAAAITEST test\n", stderr="")
+        self.manager._validate_public_key_content = MagicMock(return_value={"valid": True, "fingerprint": "SHA256:a"})
+
+        first = self.manager._derive_public_key(str(self.key_path))
+        second = self.manager._derive_public_key(str(self.key_path))
+        self.assertEqual(mock_run.call_count, 1)
+        self.assertEqual(first, second)
+
+        stat = self.key_path.stat()
+        os.utime(self.key_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        self.manager._derive_public_key(str(self.key_path))
+        self.assertEqual(mock_run.call_count, 2)
+
+    def test_verify_ssh_logins_runs_checks_concurrently(self):
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def slow_login(host_config, key_path):
+            with lock:
+                active.append(host_config["ansible_host"])
+                peak.append(len(active))
+            time.sleep(0.1)
+            with lock:
+                active.remove(host_config["ansible_host"])
+            return host_config["ansible_host"] != "10.0.1.3", "checked"
+
+        self.manager._verify_ssh_login = MagicMock(side_effect=slow_login)
+
+        results = self.manager._verify_ssh_logins(
+            {name: (config, str(self.key_path)) for name, config in self.hosts.items()}
+        )
+
+        self.assertGreater(max(peak), 1)
+        self.assertEqual(len(results), 6)
+        self.assertFalse(results["node-3"][0])
+        self.assertTrue(results["node-0"][0])
+
+    def test_validate_key_authentication_derives_shared_key_once_and_saves_once(self):
+        self.app.select_hosts = MagicMock(return_value=list(self.hosts))
+        self.manager._run_public_key_derivation = MagicMock(return_value={"valid": True, "fingerprint": "SHA256:shared"})
+        self.manager._verify_ssh_login = MagicMock(
+            side_effect=lambda config, key: (config["ansible_host"] != "10.0.1.5", "denied")
+        )
+
+        self.manager.validate_key_authentication()
+
+        self.manager._run_public_key_derivation.assert_called_once()
+        self.app._save_configuration.assert_called_once()
+        self.assertEqual(self.hosts["node-0"]["r1setup_ssh_auth_mode"], r1setup.SSH_AUTH_MODE_KEY_VERIFIED)
+        self.assertEqual(self.hosts["node-0"]["r1setup_ssh_last_verified_fingerprint"], "SHA256:shared")
+        self.assertEqual(self.hosts["node-5"]["r1setup_ssh_auth_mode"], r1setup.SSH_AUTH_MODE_VERIFICATION_FAILED)
+
+    def test_hardening_action_retries_per_host_after_combined_failure(self):
+        self.manager._run_playbook_for_hosts = MagicMock(
+            side_effect=lambda playbook, hosts, extra_vars, show_output: (hosts != ["node-1"] and len(hosts) == 1, "out")
+        )
+
+        results = self.manager._run_hardening_action("confirm", ["node-0", "node-1", "node-2"])
+
+        self.assertEqual(self.manager._run_playbook_for_hosts.call_count, 4)
+        self.assertEqual(self.manager._run_playbook_for_hosts.call_args_list[0].args[1], ["node-0", "node-1", "node-2"])
+        self.assertEqual({name for name, (ok, _) in results.items() if not ok}, {"node-1"})
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""Tests for the optional SQLite state store and the sqlite config backend."""
+
+import copy
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import yaml
+
+from tests.support import r1setup
+
+
+def _inventory(**hosts):
+    return {"all": {"children": {"gpu_nodes": {"hosts": hosts}}}}
+
+
+def _metadata(candidates=None):
+    return {
+        "config_name": "demo",
+        "environment": "mainnet",
+        "fleet_state": {
+            "config_schema_version": r1setup.CONFIG_SCHEMA_VERSION,
+            "fleet": {
+                "machines": {
+                    "m1": {
+                        "machine_id": "m1",
+                        "instance_names": ["node-1"],
+                        "discovery": {"last_scanned_at": "2026-01-01T00:00:00", "candidates": candidates or []},
+                    },
+                },
+                "instances": {"node-1": {"assigned_machine_id": "m1"}},
+            },
+        },
+        "migration_plan_state": {"status": "planned"},
+    }
+
+
+class TestSQLiteStateStore(unittest.TestCase):
+    """Verify round-trips, row-level updates and cascades."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.store = r1setup.SQLiteStateStore(Path(self.tmp.name) / "state.db")
+        self.addCleanup(self.store.close)
+        self.inventory = _inventory(**{"node-1": {"ansible_host": "10.0.0.1", "node_status": "running"}})
+        self.metadata = _metadata([{"service_name": "edge_node"}, {"service_name": "edge_node_2"}])
+
+    def test_round_trip_matches_the_file_format(self):
+        self.store.save_config("demo", self.metadata, self.inventory)
+
+        inventory, metadata = self.store.load_config("demo")
+
+        self.assertEqual(inventory, self.inventory)
+        self.assertEqual(metadata, self.metadata)
+        self.assertEqual(
+            self.store.render_inventory_yaml("demo"), yaml.safe_dump(self.inventory, default_flow_style=False),
+        )
+        self.assertEqual(self.store.connect().execute("PRAGMA journal_mode").fetchone()[0], "wal")
+
+    def test_resave_writes_only_changed_rows_and_records_status_changes(self):
+        self.store.save_config("demo", self.metadata, self.inventory)
+        self.assertEqual(self.store.save_config("demo", self.metadata, self.inventory), {"written": 0, "deleted": 0})
+
+        inventory = copy.deepcopy(self.inventory)
+        inventory["all"]["children"]["gpu_nodes"]["hosts"]["node-1"]["node_status"] = "stopped"
+        counts = self.store.save_config("demo", self.metadata, inventory)
+
+        self.assertEqual(counts, {"written": 1, "deleted": 0})
+        history = self.store.status_history("demo", "node-1")
+        self.assertEqual([entry["status"] for entry in history], ["running", "stopped"])
+        self.assertEqual(self.store.machine_instance_names("demo", "m1"), ["node-1"])
+
+    def test_shorter_scan_and_cleared_plan_delete_rows(self):
+        self.store.save_config("demo", self.metadata, self.inventory)
+        metadata = _metadata([{"service_name": "edge_node"}])
+        metadata.pop("migration_plan_state")
+
+        counts = self.store.save_config("demo", metadata, self.inventory)
+
+        self.assertEqual(counts["deleted"], 2)
+        self.assertEqual(self.store.load_config("demo")[1], metadata)
+
+    def test_rename_and_delete_cascade_to_every_table(self):
+        self.store.save_config("demo", self.metadata, self.inventory)
+
+        self.store.rename_config("demo", "prod")
+
+        self.assertEqual(self.store.config_names(), ["prod"])
+        self.assertEqual(len(self.store.load_config("prod")[1]["fleet_state"]["fleet"]["machines"]["m1"]["discovery"]["candidates"]), 2)
+        self.store.delete_config("prod")
+        conn = self.store.connect()
+        for table in ("machines", "instances", "discovery_candidates", "status_samples", "migration_plans"):
+            self.assertEqual(conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0], 0, table)
+
+
+class TestSQLiteConfigBackend(unittest.TestCase):
+    """Verify ConfigurationManager persistence through the sqlite backend."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        base_path = Path(self.tmp.name)
+        self.app = MagicMock()
+        self.app.r1_setup_dir = base_path
+        self.app.config_dir = base_path
+        self.app.configs_dir = base_path / "configs"
+        self.app.configs_dir.mkdir()
+        self.app.config_file = base_path / "hosts.yml"
+        self.app.vars_file = base_path / "group_vars" / "variables.yml"
+        self.app.active_config_file = base_path / "active_config.json"
+        self.app.inventory = _inventory(**{"node-1": {"ansible_host": "10.0.0.1", "ansible_user": "root"}})
+        self.app.settings_manager = MagicMock(state_backend="files")
+        self.cm = r1setup.ConfigurationManager(self.app)
+        self.cm._update_hosts_symlink = MagicMock()
+        self.cm.active_config["config_name"] = "demo"
+
+    def _sidecar(self):
+        return json.loads((self.app.configs_dir / "demo.json").read_text())
+
+    def test_sqlite_backend_keeps_a_slim_sidecar_and_the_ansible_inventory(self):
+        self.app.settings_manager.state_backend = "sqlite"
+
+        self.cm._save_config_with_metadata("demo", "mainnet", 1, update_symlink=False)
+        self.cm.set_migration_plan_state({"status": "planned"})
+
+        sidecar = self._sidecar()
+        self.assertEqual(sidecar["state_backend"], "sqlite")
+        self.assertNotIn("fleet_state", sidecar)
+        self.assertNotIn("migration_plan_state", sidecar)
+        self.assertNotIn("fleet_state", json.loads(self.app.active_config_file.read_text()))
+        inventory = yaml.safe_load((self.app.configs_dir / "demo.yml").read_text())
+        self.assertIn("node-1", inventory["all"]["children"]["gpu_nodes"]["hosts"])
+        metadata = self.cm._read_config_metadata("demo")
+        self.assertIn("node-1", metadata["fleet_state"]["fleet"]["instances"])
+        self.assertEqual(metadata["migration_plan_state"], {"status": "planned"})
+
+    def test_switching_backends_round_trips_every_config(self):
+        self.cm._save_config_with_metadata("demo", "mainnet", 1, update_symlink=False)
+        self.cm.set_migration_plan_state({"status": "planned"})
+        original = self._sidecar()
+        self.app.settings_manager.set.side_effect = (
+            lambda key, value: setattr(self.app.settings_manager, key, value)
+        )
+
+        self.assertTrue(self.cm.switch_state_backend("sqlite"))
+        self.assertNotIn("fleet_state", self._sidecar())
+        self.assertTrue(self.cm.switch_state_backend("files"))
+
+        self.assertEqual(self._sidecar(), original)
+        self.app.settings_manager.set.assert_called_with("state_backend", "files")
+
+    def test_import_over_an_existing_config_replaces_its_stored_state(self):
+        self.app.settings_manager.state_backend = "sqlite"
+        self.cm.fleet_state = copy.deepcopy(_metadata()["fleet_state"])
+        self.cm._save_config_with_metadata("demo", "mainnet", 1, update_symlink=False)
+        self.cm.set_migration_plan_state({"instance_name": "old-node", "status": "planned"})
+        imported_metadata = _metadata()
+        imported_metadata["fleet_state"]["fleet"] = {
+            "machines": {"m2": {"machine_id": "m2", "instance_names": ["node-2"]}},
+            "instances": {"node-2": {"assigned_machine_id": "m2"}},
+        }
+        imported_metadata["migration_plan_state"] = {"instance_name": "node-2", "status": "completed"}
+        export_path = Path(self.tmp.name) / "demo.r1config"
+        export_path.write_text(json.dumps({"configuration": {
+            "name": "demo",
+            "metadata": imported_metadata,
+            "inventory": _inventory(**{"node-2": {"ansible_host": "10.0.0.2", "ansible_user": "root"}}),
+        }}))
+        self.app.get_input.side_effect = [str(export_path), "y", "demo", "y", "n"]
+
+        self.cm._import_configuration()
+
+        metadata = self.cm._read_config_metadata("demo")
+        self.assertEqual(list(metadata["fleet_state"]["fleet"]["machines"]), ["m2"])
+        self.assertEqual(list(metadata["fleet_state"]["fleet"]["instances"]), ["node-2"])
+        self.assertEqual(metadata["migration_plan_state"], {"instance_name": "node-2", "status": "completed"})
+        self.assertEqual(self._sidecar()["state_backend"], "sqlite")
+        inventory = yaml.safe_load((self.app.configs_dir / "demo.yml").read_text())
+        self.assertEqual(list(inventory["all"]["children"]["gpu_nodes"]["hosts"]), ["node-2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
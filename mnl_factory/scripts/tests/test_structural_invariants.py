@@ -2,6 +2,7 @@
 """Structural and regression invariants for the r1setup script."""
 
 import re
+import yaml
 import unittest
 from pathlib import Path
 
@@ -370,3 +371,160 @@ class TestStructuralInvariants(unittest.TestCase):
             apply_instance_playbook_source,
             "apply_instance.yml must exist for instance-level runtime application",
         )
+
+    def test_image_distribution_modes_are_wired_into_setup_role(self):
+        role_dir = R1SETUP_PATH.parent.parent / "roles" / "setup"
+        main_tasks_source = (role_dir / "tasks" / "main.yml").read_text()
+        distribute_tasks_source = (role_dir / "tasks" / "distribute_image.yml").read_text()
+        daemon_template_source = (role_dir / "templates" / "docker_daemon.json.j2").read_text()
+        service_template_source = (role_dir / "templates" / "edge_node.service.j2").read_text()
+
+        self.assertIn(
+            "include_tasks: distribute_image.yml",
+            main_tasks_source,
+            "setup role must route controller distribution through distribute_image.yml",
+        )
+        self.assertIn(
+            "when: mnl_image_distribution != 'controller'",
+            main_tasks_source,
+            "registry pull must be skipped when the controller distributes the image",
+        )
+        self.assertIn(
+            "inventory_hostname == r1setup_machine_leader",
+            distribute_tasks_source,
+            "image archive must be transferred once per machine, not once per instance",
+        )
+        self.assertNotIn(
+            "r1setup_image_machine_leader",
+            distribute_tasks_source,
+            "image distribution must use the shared machine leader, not a local one",
+        )
+        self.assertIn(
+            "r1setup_image_needs_transfer",
+            distribute_tasks_source,
+            "machines that already have the controller image id must be skipped",
+        )
+        self.assertIn(
+            '"registry-mirrors"',
+            daemon_template_source,
+            "docker_daemon.json.j2 must support a registry mirror",
+        )
+        self.assertRegex(
+            service_template_source,
+            r"\{% if \(mnl_image_distribution \| default\('registry'\)\) != 'controller' %\}\nExecStartPre=-",
+            "edge_node.service.j2 must not re-pull from the registry in controller distribution mode",
+        )
+
+    def test_unit_pull_is_coordinated_per_machine(self):
+        role_dir = R1SETUP_PATH.parent.parent / "roles" / "setup"
+        service_template_source = (role_dir / "templates" / "edge_node.service.j2").read_text()
+        pull_helper_source = (role_dir / "templates" / "r1setup-image-pull.j2").read_text()
+        render_tasks_source = (role_dir / "tasks" / "render_edge_node_definition.yml").read_text()
+
+        self.assertNotIn(
+            "ExecStartPre=-/usr/bin/docker pull",
+            service_template_source,
+            "edge_node.service.j2 must not run an unconditional docker pull on every start",
+        )
+        self.assertIn(
+            "ExecStartPre=-{{ mnl_image_pull_helper_path | default('/usr/local/bin/r1setup-image-pull') }} {{ mnl_docker_image_url }}",
+            service_template_source,
+            "edge_node.service.j2 must pull through the coordinated pull helper",
+        )
+        self.assertIn(
+            'flock -w "$LOCK_TIMEOUT" 9',
+            pull_helper_source,
+            "r1setup-image-pull must serialize pulls of the same image on one machine",
+        )
+        self.assertIn(
+            '[ "$AGE" -lt "$TTL" ]',
+            pull_helper_source,
+            "r1setup-image-pull must reuse a fresh digest record without contacting the registry",
+        )
+        self.assertLess(
+            render_tasks_source.index("Install coordinated image pull helper"),
+            render_tasks_source.index("Create service for"),
+            "the pull helper must be installed before the unit that calls it",
+        )
+
+    def test_service_updates_diff_before_restarting(self):
+        playbook_dir = R1SETUP_PATH.parent.parent / "playbooks"
+        diff_playbook_source = (playbook_dir / "service_diff.yml").read_text()
+        customize_playbook_source = (playbook_dir / "customize_service.yml").read_text()
+
+        self.assertIn(
+            "import_tasks: tasks/resolve_instance_runtime_vars.yml",
+            diff_playbook_source,
+            "service_diff.yml must resolve per-instance runtime vars like customize_service.yml",
+        )
+        self.assertEqual(
+            diff_playbook_source.count("check_mode: true"),
+            2,
+            "service_diff.yml must render the unit and env file in check mode only",
+        )
+        self.assertIn(
+            "state: \"{{ 'restarted' if r1setup_service_unit_render is changed else 'started' }}\"",
+            customize_playbook_source,
+            "customize_service.yml must only restart instances whose unit changed",
+        )
+
+    def test_machine_level_setup_steps_run_once_per_machine(self):
+        factory_dir = R1SETUP_PATH.parent.parent
+        group_vars_source = (factory_dir / "group_vars" / "mnl.yml").read_text()
+        main_tasks = yaml.safe_load((factory_dir / "roles" / "setup" / "tasks" / "main.yml").read_text())
+        service_tasks = yaml.safe_load((factory_dir / "roles" / "setup" / "tasks" / "services.yml").read_text())
+        leader_condition = "inventory_hostname == r1setup_machine_leader"
+
+        self.assertIn("r1setup_machine_leader:", group_vars_source)
+        self.assertIn("ansible_play_hosts", group_vars_source, "a failed leader must hand over to the next instance")
+
+        def conditions(tasks, name):
+            task = next(task for task in tasks if task.get("name") == name)
+            when = task.get("when", [])
+            return " and ".join(when) if isinstance(when, list) else str(when)
+
+        for name in ("Log into Docker registry", "Pull Docker image"):
+            self.assertIn(leader_condition, conditions(main_tasks, name), f"{name} must run once per machine")
+        for name in (
+            "Create /etc/docker/daemon.json",
+            "Force restart docker",
+            "Reload systemd for Edge Node service",
+            "Create r1service dispatcher",
+        ):
+            self.assertIn(leader_condition, conditions(service_tasks, name), f"{name} must run once per machine")
+        for name in ("Render edge node runtime definition", "Start the service"):
+            self.assertNotIn(leader_condition, conditions(service_tasks, name), f"{name} must run per instance")
+
+    def test_package_cache_proxy_is_rolled_back_and_keeps_apt_cache(self):
+        factory_dir = R1SETUP_PATH.parent.parent
+        docker_tasks_source = (factory_dir / "roles" / "docker" / "tasks" / "main.yml").read_text()
+
+        for relative_path in ("prepare_machine.yml", "site.yml"):
+            source = (factory_dir / "playbooks" / relative_path).read_text()
+            self.assertIn(
+                "import_tasks: tasks/apt_proxy_enable.yml",
+                source,
+                f"{relative_path} must point apt at the package cache proxy when configured",
+            )
+            self.assertLess(
+                source.index("always:"),
+                source.index("import_tasks: tasks/apt_proxy_disable.yml"),
+                f"{relative_path} must roll the proxy back in an always block",
+            )
+
+        self.assertEqual(
+            docker_tasks_source.count("when: mnl_apt_proxy_url | default('') | length == 0"),
+            3,
+            "docker role must not wipe the apt cache while the package cache proxy is active",
+        )
+        enable_source = (factory_dir / "playbooks" / "tasks" / "apt_proxy_enable.yml").read_text()
+        self.assertNotIn("default(3142", enable_source, "a proxy URL without a port must use the scheme's port")
+        self.assertIn("ternary(443, 80)", enable_source)
+
+        prerequisites_source = (factory_dir / "roles" / "prerequisites" / "tasks" / "main.yml").read_text()
+        self.assertNotIn("autoclean: yes", prerequisites_source)
+        self.assertEqual(
+            prerequisites_source.count("autoclean: \"{{ mnl_apt_proxy_url | default('') | length == 0 }}\""),
+            4,
+            "prerequisites role must not autoclean the apt cache while the package cache proxy is active",
+        )
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""Tests for bandwidth-capped backup and migration transfers."""
+
+import io
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from tests.support import r1setup
+
+
+class _FakeClock:
+    """Monotonic clock that only advances when the limiter sleeps."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestTransferRateLimiter(unittest.TestCase):
+    """Verify the token bucket, live cap changes and throughput stats."""
+
+    def setUp(self):
+        self.clock = _FakeClock()
+
+    def _limiter(self, rate_kbps=0, **kwargs):
+        return r1setup.TransferRateLimiter(rate_kbps, clock=self.clock, sleep=self.clock.sleep, **kwargs)
+
+    def test_combine_kbps_picks_lowest_non_zero_cap(self):
+        self.assertEqual(r1setup.TransferRateLimiter.combine_kbps(0, 8000, 4000), 4000)
+        self.assertEqual(r1setup.TransferRateLimiter.combine_kbps(0, 0), 0)
+
+    def test_unlimited_relay_never_sleeps(self):
+        sink = io.BytesIO()
+
+        copied = self._limiter().relay(io.BytesIO(b"x" * 200000), sink)
+
+        self.assertEqual(copied, 200000)
+        self.assertEqual(sink.getvalue(), b"x" * 200000)
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_capped_relay_sleeps_in_poll_sized_slices(self):
+        limiter = self._limiter(8)  # 8 Kbit/s = 1000 bytes/s, 500 byte burst
+
+        limiter.relay(io.BytesIO(b"x" * 4000), io.BytesIO())
+
+        self.assertEqual(self.clock.sleeps, [2.0, 1.5])
+        stats = limiter.stats()
+        self.assertEqual(stats["bytes"], 4000)
+        self.assertEqual(stats["seconds"], 3.5)
+        self.assertEqual(stats["throughput_bps"], 1142)
+        self.assertEqual(stats["cap_kbps"], 8)
+
+    def test_global_cap_change_applies_to_running_transfer(self):
+        caps = iter([8, 0])
+        limiter = self._limiter(rate_source=lambda: next(caps))
+
+        limiter.relay(io.BytesIO(b"x" * 4000), io.BytesIO())
+
+        self.assertEqual(self.clock.sleeps, [2.0])
+        self.assertEqual(limiter.stats()["cap_kbps"], 0)
+
+    def test_non_numeric_rate_source_is_ignored(self):
+        limiter = self._limiter(rate_source=MagicMock())
+
+        self.assertEqual(limiter.effective_kbps(), 0)
+
+
+class TestTransferBandwidthSetting(unittest.TestCase):
+    """Verify the global cap setting and its live reload."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.settings = r1setup.SettingsManager(MagicMock(r1_setup_dir=Path(self.tmp.name)))
+
+    def test_cap_is_stored_in_mbit_and_reported_in_kbit(self):
+        self.assertEqual(self.settings.transfer_bandwidth_limit_kbps, 0)
+
+        self.settings.set("transfer_bandwidth_limit", 2.5)
+
+        self.assertEqual(self.settings.transfer_bandwidth_limit_kbps, 2500)
+
+    def test_cap_written_by_another_session_is_picked_up(self):
+        self.settings.save_settings()
+        payload = dict(self.settings.settings, transfer_bandwidth_limit=50)
+        self.settings.settings_file.write_text(json.dumps(payload))
+
+        self.assertEqual(self.settings.current_transfer_bandwidth_limit_kbps(), 50000)
+        self.assertFalse(self.settings.reload_if_changed())
+
+
+class TestRelayTransfer(unittest.TestCase):
+    """Run the relay against local commands standing in for ssh."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.tmp_path = Path(self.tmp.name)
+        self.app = MagicMock(connection_timeout=30)
+        self.app.settings_manager = None
+        self.planner = r1setup.MigrationPlanner(self.app)
+
+    @staticmethod
+    def _local_command(script):
+        return [sys.executable, "-c", script]
+
+    def test_download_streams_command_output_and_reports_throughput(self):
+        local_path = self.tmp_path / "archive.tar.gz"
+        self.app._build_machine_ssh_command = MagicMock(
+            return_value=self._local_command("import sys; sys.stdout.buffer.write(b'a' * 200000)")
+        )
+
+        result = self.planner._copy_from_machine(
+            {"ansible_host": "10.0.0.1", "ansible_user": "root"}, "/tmp/my archive.tar.gz", str(local_path),
+        )
+
+        self.assertEqual(result["status"], "success")
+        self.assertEqual(result["bytes"], 200000)
+        self.assertIn("throughput_bps", result)
+        self.assertEqual(local_path.stat().st_size, 200000)
+        remote_command = self.app._build_machine_ssh_command.call_args.args[1]
+        self.assertEqual(remote_command, "cat -- '/tmp/my archive.tar.gz'")
+
+    def test_upload_feeds_the_local_file_to_command_stdin(self):
+        local_path = self.tmp_path / "archive.tar.gz"
+        local_path.write_bytes(b"payload" * 1000)
+        received = self.tmp_path / "received"
+        self.app._build_machine_ssh_command = MagicMock(return_value=self._local_command(
+            f"import sys; open({str(received)!r}, 'wb').write(sys.stdin.buffer.read())"
+        ))
+
+        result = self.planner._copy_to_machine(
+            {"ansible_host": "10.0.0.1", "ansible_user": "root"}, str(local_path), "/tmp/archive.tar.gz",
+        )
+
+        self.assertEqual(result["status"], "success")
+        self.assertEqual(received.read_bytes(), b"payload" * 1000)
+        self.assertEqual(self.app._build_machine_ssh_command.call_args.args[1], "cat > /tmp/archive.tar.gz")
+
+    def test_remote_failure_reports_stderr(self):
+        result = self.planner._relay_transfer(
+            self._local_command("import sys; sys.stderr.write('No such file'); sys.exit(1)"),
+            self.tmp_path / "archive.tar.gz",
+            r1setup.TransferRateLimiter(),
+            download=True,
+        )
+
+        self.assertEqual(result["status"], "error")
+        self.assertEqual(result["message"], "No such file")
+        self.assertEqual(result["returncode"], 1)
+
+    def test_stalled_transfer_is_killed_after_timeout(self):
+        result = self.planner._relay_transfer(
+            self._local_command("import time; time.sleep(30)"),
+            self.tmp_path / "archive.tar.gz",
+            r1setup.TransferRateLimiter(),
+            download=True,
+            timeout=1,
+        )
+
+        self.assertEqual(result["status"], "error")
+        self.assertIn("stalled", result["message"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,12 +1,72 @@
 #!/usr/bin/env python3
 """Tests for VersionManager behavior."""
 
+import hashlib
+import tempfile
+import threading
 import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 from tests.support import r1setup
 
 
+class _UpdateServer:
+    """Local stand-in for the release host: ETags, redirects and a request log."""
+
+    def __init__(self, files):
+        self.files = files
+        self.requests = []
+        self.clients = set()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                server.requests.append((self.path, self.headers.get("If-None-Match")))
+                server.clients.add(self.client_address)
+                if self.path.startswith("/latest/"):
+                    self._reply(302, b"", {"Location": "/v2/" + self.path.rsplit("/", 1)[1]})
+                    return
+                body = server.files.get(self.path)
+                if body is None:
+                    self._reply(404, b"missing")
+                    return
+                etag = '"%s"' % hashlib.sha256(body).hexdigest()[:16]
+                if self.headers.get("If-None-Match") == etag:
+                    self._reply(304, b"", {"ETag": etag})
+                    return
+                self._reply(200, body, {"ETag": etag})
+
+            def _reply(self, code, body, headers=None):
+                self.send_response(code)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = "http://127.0.0.1:%d" % self.httpd.server_address[1]
+        threading.Thread(target=self.httpd.serve_forever, args=(0.05,), daemon=True).start()
+
+    def paths(self):
+        return [path for path, _ in self.requests]
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def _manifest(files):
+    return "".join(f"{hashlib.sha256(body).hexdigest()}  {name}\n" for name, body in files.items()).encode()
+
+
 class TestAutoUpdateCheck(unittest.TestCase):
     """Tests for VersionManager._auto_update_check()."""
 
@@ -56,3 +116,177 @@ class TestCompareVersions(unittest.TestCase):
 
     def test_non_numeric_part(self):
         self.assertEqual(self._cmp("1.abc.0", "1.0.0"), 0)
+
+
+class TestUpdateFetcher(unittest.TestCase):
+    """Verify pooled connections, redirects and ETag revalidation."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = Path(self.tmp.name)
+        self.server = _UpdateServer({"/v2/r1setup": b"new cli", "/v2/ver.py": b"__VER__ = '2.0.0'\n"})
+        self.addCleanup(self.server.close)
+
+    def test_unchanged_files_are_revalidated_not_transferred(self):
+        fetcher = r1setup.UpdateFetcher(self.path / "cache")
+        self.addCleanup(fetcher.close)
+
+        first = fetcher.fetch(self.server.url + "/v2/r1setup", self.path / "a")
+        redirected = fetcher.fetch(self.server.url + "/latest/ver.py", self.path / "b")
+
+        self.assertEqual(first["status"], "downloaded")
+        self.assertEqual((self.path / "b").read_bytes(), b"__VER__ = '2.0.0'\n")
+        self.assertEqual(redirected["sha256"], hashlib.sha256(b"__VER__ = '2.0.0'\n").hexdigest())
+        self.assertEqual(fetcher.connections_opened, 1)
+        self.assertEqual(len(self.server.clients), 1)
+
+        second = r1setup.UpdateFetcher(self.path / "cache")
+        self.addCleanup(second.close)
+        again = second.fetch(self.server.url + "/v2/r1setup", self.path / "c")
+
+        self.assertEqual(again["status"], "not_modified")
+        self.assertEqual((self.path / "c").read_bytes(), b"new cli")
+        self.assertIsNotNone(self.server.requests[-1][1])
+
+    def test_only_mutable_urls_are_cached_and_stale_entries_pruned(self):
+        self.server.files["/main/ver.py"] = b"__VER__ = '2.0.0'\n"
+        legacy = r1setup.UpdateFetcher(self.path / "cache")
+        self.addCleanup(legacy.close)
+        legacy.fetch(self.server.url + "/v2/r1setup", self.path / "a")
+        legacy_body = legacy._body_path(self.server.url + "/v2/r1setup")
+        self.assertTrue(legacy_body.exists())
+
+        fetcher = r1setup.UpdateFetcher(self.path / "cache", cache_prefixes=(self.server.url + "/main/",))
+        self.addCleanup(fetcher.close)
+        fetcher.fetch(self.server.url + "/v2/ver.py", self.path / "b")
+        fetcher.fetch(self.server.url + "/main/ver.py", self.path / "c")
+        again = fetcher.fetch(self.server.url + "/v2/r1setup", self.path / "d")
+
+        self.assertEqual(again["status"], "downloaded")
+        self.assertIsNone(self.server.requests[-1][1])
+        self.assertEqual(list(fetcher._etags), [self.server.url + "/main/ver.py"])
+        self.assertFalse(legacy_body.exists())
+        self.assertEqual(fetcher.fetch(self.server.url + "/main/ver.py", self.path / "e")["status"], "not_modified")
+
+    def test_error_responses_raise_http_errors(self):
+        fetcher = r1setup.UpdateFetcher()
+        self.addCleanup(fetcher.close)
+
+        with self.assertRaises(r1setup.urllib.error.HTTPError) as raised:
+            fetcher.fetch(self.server.url + "/v2/missing", self.path / "x")
+
+        self.assertEqual(raised.exception.code, 404)
+
+    def test_parse_checksum_manifest(self):
+        digest = "a" * 64
+        text = f"# release v2\n{digest}  r1setup\n{digest.upper()} *ver.py\nnot a line\n"
+
+        self.assertEqual(r1setup.UpdateFetcher.parse_checksum_manifest(text), {"r1setup": digest, "ver.py": digest})
+
+
+class TestPerformUpdate(unittest.TestCase):
+    """Run the self-update against a local release server."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.install_dir = Path(self.tmp.name) / "bin"
+        self.install_dir.mkdir()
+        (self.install_dir / "r1setup").write_bytes(b"old cli")
+        (self.install_dir / "r1setup").chmod(0o755)
+        (self.install_dir / "ver.py").write_bytes(b"__VER__ = '1.0.0'\n")
+        (self.install_dir / "update.py").write_bytes(b"updater")
+        self.release = {"r1setup": b"new cli", "ver.py": b"__VER__ = '2.0.0'\n", "update.py": b"updater"}
+        files = {f"/v2/{name}": body for name, body in self.release.items()}
+        files["/v2/SHA256SUMS"] = _manifest(self.release)
+        self.server = _UpdateServer(files)
+        self.addCleanup(self.server.close)
+        self.manager = r1setup.VersionManager(MagicMock())
+        self.manager.update_cache_dir = Path(self.tmp.name) / "cache"
+
+    def _update(self, fallback=None):
+        urls = {name: f"{self.server.url}/v2/{name}" for name in self.release}
+        validation = MagicMock(returncode=0)
+        with patch("sys.argv", [str(self.install_dir / "r1setup")]), \
+                patch.object(r1setup.subprocess, "run", return_value=validation):
+            return self.manager._perform_update("2.0.0", urls, fallback)
+
+    def test_changed_files_are_verified_and_current_ones_skipped(self):
+        self.assertTrue(self._update())
+
+        self.assertEqual((self.install_dir / "r1setup").read_bytes(), b"new cli")
+        self.assertEqual((self.install_dir / "ver.py").read_bytes(), b"__VER__ = '2.0.0'\n")
+        self.assertTrue((self.install_dir / "r1setup").stat().st_mode & 0o100)
+        self.assertEqual(self.server.paths()[0], "/v2/SHA256SUMS")
+        self.assertNotIn("/v2/update.py", self.server.paths())
+
+    def test_checksum_mismatch_falls_back_and_blocks_install_when_unresolved(self):
+        self.server.files["/v2/ver.py"] = b"tampered"
+        self.server.files["/main/ver.py"] = self.release["ver.py"]
+        self.server.files["/v2/r1setup"] = b"tampered"
+
+        self.assertFalse(self._update({"ver.py": f"{self.server.url}/main/ver.py"}))
+        self.assertEqual((self.install_dir / "r1setup").read_bytes(), b"old cli")
+        self.assertEqual((self.install_dir / "ver.py").read_bytes(), b"__VER__ = '1.0.0'\n")
+
+        self.server.files["/v2/r1setup"] = self.release["r1setup"]
+        self.assertTrue(self._update({"ver.py": f"{self.server.url}/main/ver.py"}))
+        self.assertEqual((self.install_dir / "ver.py").read_bytes(), self.release["ver.py"])
+
+    def test_any_checksum_mismatch_aborts_the_whole_install(self):
+        self.release["update.py"] = b"new updater"
+        self.server.files["/v2/SHA256SUMS"] = _manifest(self.release)
+        self.server.files["/v2/update.py"] = b"tampered"
+
+        self.assertFalse(self._update())
+        self.assertEqual((self.install_dir / "r1setup").read_bytes(), b"old cli")
+        self.assertEqual((self.install_dir / "ver.py").read_bytes(), b"__VER__ = '1.0.0'\n")
+        self.assertEqual((self.install_dir / "update.py").read_bytes(), b"updater")
+
+    def test_release_assets_are_not_kept_in_the_update_cache(self):
+        self.assertTrue(self._update())
+
+        cache = self.manager.update_cache_dir
+        self.assertEqual([path.name for path in cache.iterdir()] if cache.exists() else [], [])
+
+
+class TestCollectionArchiveCache(unittest.TestCase):
+    """Verify the collection installs from a cached archive of the target version."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        app = MagicMock()
+        app.ansible_config_root = Path(self.tmp.name) / "ansible"
+        app._get_service_overrides.return_value = {}
+        self.manager = r1setup.VersionManager(app)
+        self.manager.collection_cache_dir = Path(self.tmp.name) / "collections"
+        self.commands = []
+
+    def _run(self, cmd, **kwargs):
+        self.commands.append(cmd)
+        if cmd[2] == "download":
+            archive = Path(cmd[-1]) / "ratio1-multi_node_launcher-1.6.0.tar.gz"
+            archive.write_bytes(b"archive")
+        return MagicMock(returncode=0, stdout="ratio1.multi_node_launcher 1.6.0", stderr="")
+
+    def test_archive_is_downloaded_once_then_reused(self):
+        with patch.object(r1setup.subprocess, "run", side_effect=self._run):
+            self.manager._update_ansible_collection("1.6.0")
+            self.manager._update_ansible_collection("1.6.0")
+
+        actions = [cmd[2] for cmd in self.commands if cmd[1] == "collection" and cmd[2] != "list"]
+        archive = str(self.manager.collection_cache_dir / "ratio1-multi_node_launcher-1.6.0.tar.gz")
+        self.assertEqual(actions, ["download", "install", "install"])
+        self.assertEqual([cmd[3] for cmd in self.commands if cmd[2] == "install"], [archive, archive])
+
+    def test_unknown_target_version_installs_from_galaxy(self):
+        with patch.object(r1setup.subprocess, "run", side_effect=self._run):
+            self.manager._update_ansible_collection()
+
+        self.assertEqual(self.commands[0][3], "ratio1.multi_node_launcher")
+
+
+if __name__ == "__main__":
+    unittest.main()